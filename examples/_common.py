@@ -0,0 +1,144 @@
+"""
+Shared helpers for the MCP server usage examples.
+"""
+import asyncio
+import json
+import re
+import sys
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+_SEP = "=" * 70
+_TEMPLATE = "\n" + _SEP + "\n  {}\n" + _SEP + "\n\n"
+_PATH_RE = re.compile(r"^\*\*Path:\*\*\s*(.+)$", re.M)
+
+SERVER_PARAMS = StdioServerParameters(
+    command=sys.executable,
+    args=["-m", "magento_graphql_docs_mcp.server"],
+    env=None
+)
+
+# Maximum number of tool results kept by CachedSession
+CACHE_SIZE = 64
+
+# Server connection shared by every example run in this process
+_shared_stack = None
+_shared_session = None
+
+
+def print_section(title):
+    """Print a formatted section header"""
+    sys.stdout.write(_TEMPLATE.format(title))
+
+
+def first_path(text):
+    """Return the first **Path:** value in a tool result, or None"""
+    match = _PATH_RE.search(text)
+    return match.group(1).strip() if match else None
+
+
+class CachedSession:
+    """
+    ClientSession wrapper that reuses results for repeated tool calls.
+
+    Results are keyed by tool name and JSON-encoded arguments and kept in
+    a small LRU, so identical calls across chained examples only reach
+    the server once (run_all.py shares list_categories this way). Other
+    attributes are forwarded to the session.
+    """
+
+    def __init__(self, session, maxsize=CACHE_SIZE):
+        self._session = session
+        self._maxsize = maxsize
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def call_tool(self, name, arguments=None):
+        key = (name, json.dumps(arguments, sort_keys=True))
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        self.misses += 1
+        result = await self._session.call_tool(name, arguments=arguments)
+        self._cache[key] = result
+        if len(self._cache) > self._maxsize:
+            self._cache.popitem(last=False)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+@asynccontextmanager
+async def shared_session():
+    """
+    Yield an initialized ClientSession shared across example runs.
+
+    The server is spawned on first use and kept running afterwards, so
+    chained examples skip the subprocess start and initialize handshake.
+    Tool results are cached for the lifetime of the connection. The
+    connection is closed by close_shared_session().
+    """
+    global _shared_stack, _shared_session
+
+    if _shared_session is None:
+        stack = AsyncExitStack()
+        try:
+            read, write = await stack.enter_async_context(stdio_client(SERVER_PARAMS))
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+        except BaseException:
+            await stack.aclose()
+            raise
+        _shared_stack, _shared_session = stack, CachedSession(session)
+
+    yield _shared_session
+
+
+async def close_shared_session():
+    """Shut down the shared server connection, if one is open"""
+    global _shared_stack, _shared_session
+
+    if _shared_stack is not None:
+        stack = _shared_stack
+        _shared_stack = _shared_session = None
+        await stack.aclose()
+
+
+def run(*mains):
+    """
+    Run example coroutines one after another on a single event loop.
+
+    All examples reuse one server connection, which is closed from the
+    same task that opened it once the last example has finished.
+    """
+    async def run_all():
+        try:
+            for main in mains:
+                status = await main()
+                if status:
+                    return status
+            return 0
+        finally:
+            await close_shared_session()
+
+    return asyncio.run(run_all())
+
+
+async def batched_calls(session, specs):
+    """
+    Issue independent tool calls concurrently.
+
+    specs is a sequence of (tool_name, arguments) pairs. Results are
+    returned in the same order as the specs.
+    """
+    return await asyncio.gather(*(
+        session.call_tool(name, arguments=arguments)
+        for name, arguments in specs
+    ))
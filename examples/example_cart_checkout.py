@@ -10,176 +10,180 @@ This script demonstrates:
 5. Exploring the complete checkout workflow
 """
 import asyncio
+import re
 import sys
-from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+from _common import batched_calls, first_path, print_section, run, shared_session
 
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-
-
-def print_section(title):
-    """Print a formatted section header"""
-    print("\n" + "=" * 70)
-    print(f"  {title}")
-    print("=" * 70 + "\n")
+# "## tutorials" section of list_categories output, up to the next header
+_TUTORIALS_RE = re.compile(r"^## tutorials[^\n]*(?:\n.*?)?(?=^##|\Z)", re.M | re.S)
 
 
 async def main():
     """Run cart and checkout examples"""
     print_section("Magento GraphQL - Cart & Checkout Examples")
 
-    server_params = StdioServerParameters(
-        command=sys.executable,
-        args=["-m", "magento_graphql_docs_mcp.server"],
-        env=None
-    )
+    async with shared_session() as session:
+        print("✓ Connected to MCP server\n")
 
-    async with stdio_client(server_params) as (read, write):
-        async with ClientSession(read, write) as session:
-            await session.initialize()
-            print("✓ Connected to MCP server\n")
-
-            # Example 1: Search for cart documentation
-            print_section("Example 1: Search for Cart Documentation")
+        async def related_cart_documents():
+            """Example 8: find the first cart schema document, then its relatives"""
             result = await session.call_tool("search_documentation", arguments={
                 "queries": ["cart"],
-                "category": "schema"
-            })
-            print(result.content[0].text[:1000])
-            print("\n... (truncated for readability)")
-
-            # Example 2: Find cart mutations
-            print_section("Example 2: Find Cart Mutations")
-            result = await session.call_tool("search_graphql_elements", arguments={
-                "query": "cart",
-                "element_type": "mutation"
-            })
-            print(result.content[0].text[:1200])
-            print("\n... (truncated for readability)")
-
-            # Example 3: Get createEmptyCart mutation details
-            print_section("Example 3: Get 'createEmptyCart' Mutation Details")
-            result = await session.call_tool("search_graphql_elements", arguments={
-                "query": "createEmptyCart"
-            })
-            print(result.content[0].text[:1000])
-            print("\n... (truncated for readability)")
-
-            # Example 4: Get the checkout tutorial
-            print_section("Example 4: Get Complete Checkout Tutorial")
-            result = await session.call_tool("get_tutorial", arguments={
-                "tutorial_name": "checkout"
-            })
-            print(result.content[0].text[:2000])
-            print("\n... (truncated - showing first 2 steps)")
-
-            # Example 5: Search for add to cart examples
-            print_section("Example 5: Search for 'Add to Cart' Examples")
-            result = await session.call_tool("search_examples", arguments={
-                "query": "addProductsToCart",
-                "language": "graphql"
+                "content_type": "schema"
             })
-            print(result.content[0].text[:1200])
-            print("\n... (truncated for readability)")
 
-            # Example 6: Find cart query examples
-            print_section("Example 6: Find Cart Query Examples")
-            result = await session.call_tool("search_graphql_elements", arguments={
-                "query": "cart",
-                "element_type": "query"
-            })
-            print(result.content[0].text[:1000])
-            print("\n... (truncated for readability)")
+            file_path = first_path(result.content[0].text)
 
-            # Example 7: Search for checkout-specific documentation
-            print_section("Example 7: Search for Checkout Documentation")
-            result = await session.call_tool("search_documentation", arguments={
-                "queries": ["checkout"],
-                "category": "tutorials"
-            })
-            print(result.content[0].text[:1000])
-            print("\n... (truncated for readability)")
+            if not file_path:
+                return None, None
 
-            # Example 8: Find related cart documents
-            print_section("Example 8: Find Related Cart Documents")
-            result = await session.call_tool("search_documentation", arguments={
-                "queries": ["cart"],
-                "content_type": "schema"
+            related = await session.call_tool("get_related_documents", arguments={
+                "file_path": file_path,
+                "preview_length": 1000
             })
-
-            # Get the first document path
-            lines = result.content[0].text.split('\n')
-            file_path = None
-            for line in lines:
-                if line.startswith("**Path:**"):
-                    file_path = line.replace("**Path:**", "").strip()
-                    break
-
-            if file_path:
-                print(f"Finding related documents for: {file_path}\n")
-                result = await session.call_tool("get_related_documents", arguments={
-                    "file_path": file_path
-                })
-                print(result.content[0].text[:1000])
-                print("\n... (truncated for readability)")
-            else:
-                print("Could not find cart document path")
-
-            # Example 9: Search for JSON cart response examples
-            print_section("Example 9: Find Cart JSON Response Examples")
-            result = await session.call_tool("search_examples", arguments={
-                "query": "cart",
-                "language": "json"
-            })
-            print(result.content[0].text[:1000])
+            return file_path, related
+
+        # Run the independent calls and the Example 8 chain together, so
+        # the follow-up starts as soon as its own input is available
+        (
+            (
+                cart_docs,
+                cart_mutations,
+                create_empty_cart,
+                checkout_tutorial,
+                add_to_cart_examples,
+                cart_queries,
+                checkout_docs,
+                cart_json_examples,
+                categories,
+            ),
+            (file_path, related_docs),
+        ) = await asyncio.gather(
+            batched_calls(session, [
+                ("search_documentation", {
+                    "queries": ["cart"],
+                    "category": "schema",
+                    "preview_length": 1000
+                }),
+                ("search_graphql_elements", {
+                    "query": "cart",
+                    "element_type": "mutation",
+                    "preview_length": 1200
+                }),
+                ("search_graphql_elements", {
+                    "query": "createEmptyCart",
+                    "preview_length": 1000
+                }),
+                ("get_tutorial", {
+                    "tutorial_name": "checkout",
+                    "preview_length": 2000
+                }),
+                ("search_examples", {
+                    "query": "addProductsToCart",
+                    "language": "graphql",
+                    "preview_length": 1200
+                }),
+                ("search_graphql_elements", {
+                    "query": "cart",
+                    "element_type": "query",
+                    "preview_length": 1000
+                }),
+                ("search_documentation", {
+                    "queries": ["checkout"],
+                    "category": "tutorials",
+                    "preview_length": 1000
+                }),
+                ("search_examples", {
+                    "query": "cart",
+                    "language": "json",
+                    "preview_length": 1000
+                }),
+                ("list_categories", {}),
+            ]),
+            related_cart_documents(),
+        )
+
+        # Example 1: Search for cart documentation
+        print_section("Example 1: Search for Cart Documentation")
+        print(cart_docs.content[0].text)
+        print("\n... (truncated for readability)")
+
+        # Example 2: Find cart mutations
+        print_section("Example 2: Find Cart Mutations")
+        print(cart_mutations.content[0].text)
+        print("\n... (truncated for readability)")
+
+        # Example 3: Get createEmptyCart mutation details
+        print_section("Example 3: Get 'createEmptyCart' Mutation Details")
+        print(create_empty_cart.content[0].text)
+        print("\n... (truncated for readability)")
+
+        # Example 4: Get the checkout tutorial
+        print_section("Example 4: Get Complete Checkout Tutorial")
+        print(checkout_tutorial.content[0].text)
+        print("\n... (truncated - showing first 2 steps)")
+
+        # Example 5: Search for add to cart examples
+        print_section("Example 5: Search for 'Add to Cart' Examples")
+        print(add_to_cart_examples.content[0].text)
+        print("\n... (truncated for readability)")
+
+        # Example 6: Find cart query examples
+        print_section("Example 6: Find Cart Query Examples")
+        print(cart_queries.content[0].text)
+        print("\n... (truncated for readability)")
+
+        # Example 7: Search for checkout-specific documentation
+        print_section("Example 7: Search for Checkout Documentation")
+        print(checkout_docs.content[0].text)
+        print("\n... (truncated for readability)")
+
+        # Example 8: Find related cart documents
+        print_section("Example 8: Find Related Cart Documents")
+        if file_path:
+            print(f"Finding related documents for: {file_path}\n")
+            print(related_docs.content[0].text)
             print("\n... (truncated for readability)")
-
-            # Example 10: List all tutorial categories
-            print_section("Example 10: Browse All Tutorials")
-            result = await session.call_tool("list_categories", arguments={})
-            lines = result.content[0].text.split('\n')
-
-            # Find tutorials section
-            in_tutorials = False
-            print("Available tutorials:")
-            for line in lines:
-                if line.startswith("## tutorials"):
-                    in_tutorials = True
-                    print(line)
-                    continue
-                if in_tutorials:
-                    if line.startswith("##"):
-                        break
-                    if line.strip():
-                        print(line)
-
-            print_section("Summary - Checkout Workflow")
-            print("Complete checkout workflow with MCP tools:")
-            print("")
-            print("1. Create empty cart       → createEmptyCart mutation")
-            print("2. Add products to cart    → addProductsToCart mutation")
-            print("3. Set shipping address    → setShippingAddressesOnCart mutation")
-            print("4. Set shipping method     → setShippingMethodsOnCart mutation")
-            print("5. Set payment method      → setPaymentMethodOnCart mutation")
-            print("6. Place order             → placeOrder mutation")
-            print("")
-            print("✓ Searched cart documentation")
-            print("✓ Found cart mutations")
-            print("✓ Retrieved checkout tutorial")
-            print("✓ Located code examples")
-            print("✓ Explored related documents")
-            print("✓ Browsed tutorials")
-            print("\n🎉 All cart & checkout examples completed successfully!\n")
+        else:
+            print("Could not find cart document path")
+
+        # Example 9: Search for JSON cart response examples
+        print_section("Example 9: Find Cart JSON Response Examples")
+        print(cart_json_examples.content[0].text)
+        print("\n... (truncated for readability)")
+
+        # Example 10: List all tutorial categories
+        print_section("Example 10: Browse All Tutorials")
+        print("Available tutorials:")
+        match = _TUTORIALS_RE.search(categories.content[0].text)
+        if match:
+            print("\n".join(line for line in match.group(0).splitlines() if line.strip()))
+
+        print_section("Summary - Checkout Workflow")
+        print("Complete checkout workflow with MCP tools:")
+        print("")
+        print("1. Create empty cart       → createEmptyCart mutation")
+        print("2. Add products to cart    → addProductsToCart mutation")
+        print("3. Set shipping address    → setShippingAddressesOnCart mutation")
+        print("4. Set shipping method     → setShippingMethodsOnCart mutation")
+        print("5. Set payment method      → setPaymentMethodOnCart mutation")
+        print("6. Place order             → placeOrder mutation")
+        print("")
+        print("✓ Searched cart documentation")
+        print("✓ Found cart mutations")
+        print("✓ Retrieved checkout tutorial")
+        print("✓ Located code examples")
+        print("✓ Explored related documents")
+        print("✓ Browsed tutorials")
+        print("\n🎉 All cart & checkout examples completed successfully!\n")
 
     return 0
 
 
 if __name__ == "__main__":
     try:
-        sys.exit(asyncio.run(main()))
+        sys.exit(run(main))
     except KeyboardInterrupt:
         print("\n\nInterrupted by user")
         sys.exit(1)
@@ -10,141 +10,154 @@ This script demonstrates:
 """
 import asyncio
 import sys
-from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-
-
-def print_section(title):
-    """Print a formatted section header"""
-    print("\n" + "=" * 70)
-    print(f"  {title}")
-    print("=" * 70 + "\n")
+from _common import batched_calls, first_path, print_section, run, shared_session
 
 
 async def main():
     """Run customer query examples"""
     print_section("Magento GraphQL - Customer Query Examples")
 
-    server_params = StdioServerParameters(
-        command=sys.executable,
-        args=["-m", "magento_graphql_docs_mcp.server"],
-        env=None
-    )
-
-    async with stdio_client(server_params) as (read, write):
-        async with ClientSession(read, write) as session:
-            await session.initialize()
-            print("✓ Connected to MCP server\n")
+    async with shared_session() as session:
+        print("✓ Connected to MCP server\n")
 
-            # Example 1: Search for customer documentation
-            print_section("Example 1: Search for Customer Documentation")
-            result = await session.call_tool("search_documentation", arguments={
-                "queries": ["customer"],
-                "category": "schema"
-            })
-            print(result.content[0].text[:1000])
-            print("\n... (truncated for readability)")
-
-            # Example 2: Find customer mutations
-            print_section("Example 2: Find Customer Mutations")
+        async def create_customer_lookup():
+            """Example 3: fall back to code examples if the element is missing"""
             result = await session.call_tool("search_graphql_elements", arguments={
-                "query": "customer",
-                "element_type": "mutation"
+                "query": "createCustomer",
+                "preview_length": 1000
             })
-            print(result.content[0].text[:1200])
-            print("\n... (truncated for readability)")
+            if "No GraphQL elements found" not in result.content[0].text:
+                return result, None
 
-            # Example 3: Get createCustomer mutation details
-            print_section("Example 3: Get 'createCustomer' Mutation Details")
-            result = await session.call_tool("search_graphql_elements", arguments={
-                "query": "createCustomer"
+            fallback = await session.call_tool("search_examples", arguments={
+                "query": "createCustomer",
+                "language": "graphql",
+                "preview_length": 1000
             })
+            return result, fallback
 
-            if "No GraphQL elements found" in result.content[0].text:
-                print("Note: createCustomer not found as extracted element.")
-                print("Searching for customer creation examples instead...\n")
-
-                result = await session.call_tool("search_examples", arguments={
-                    "query": "createCustomer",
-                    "language": "graphql"
-                })
-                print(result.content[0].text[:1000])
-            else:
-                print(result.content[0].text[:1000])
-
-            print("\n... (truncated for readability)")
-
-            # Example 4: Search for customer authentication examples
-            print_section("Example 4: Search for Customer Authentication")
-            result = await session.call_tool("search_documentation", arguments={
-                "queries": ["customer", "token"]
-            })
-            print(result.content[0].text[:1000])
-            print("\n... (truncated for readability)")
-
-            # Example 5: Find customer address mutation examples
-            print_section("Example 5: Find Customer Address Mutations")
-            result = await session.call_tool("search_graphql_elements", arguments={
-                "query": "updateCustomerAddress"
-            })
-            print(result.content[0].text[:800])
-            print("\n... (truncated for readability)")
-
-            # Example 6: Get specific customer documentation
-            print_section("Example 6: Get Customer Query Document")
+        async def customer_query_document():
+            """Example 6: find the customer query document, then fetch it"""
             result = await session.call_tool("search_documentation", arguments={
                 "queries": ["customer", "query"],
                 "content_type": "schema"
             })
 
-            # Extract file path from first result
-            lines = result.content[0].text.split('\n')
-            file_path = None
-            for line in lines:
-                if line.startswith("**Path:**"):
-                    file_path = line.replace("**Path:**", "").strip()
-                    break
-
-            if file_path:
-                print(f"Found customer documentation at: {file_path}\n")
-                result = await session.call_tool("get_document", arguments={
-                    "file_path": file_path
-                })
-                print(result.content[0].text[:1000])
-                print("\n... (truncated for readability)")
-            else:
-                print("Could not extract file path from search results")
-
-            # Example 7: Find customer code examples
-            print_section("Example 7: Find Customer JSON Response Examples")
-            result = await session.call_tool("search_examples", arguments={
-                "query": "customer",
-                "language": "json"
+            file_path = first_path(result.content[0].text)
+
+            if not file_path:
+                return None, None
+
+            document = await session.call_tool("get_document", arguments={
+                "file_path": file_path,
+                "preview_length": 1000
             })
-            print(result.content[0].text[:1000])
+            return file_path, document
+
+        # Run the independent calls and the dependent chains together, so
+        # each follow-up starts as soon as its own input is available
+        (
+            (
+                customer_docs,
+                customer_mutations,
+                auth_docs,
+                address_mutations,
+                json_examples,
+            ),
+            (create_customer, create_customer_examples),
+            (file_path, customer_document),
+        ) = await asyncio.gather(
+            batched_calls(session, [
+                ("search_documentation", {
+                    "queries": ["customer"],
+                    "category": "schema",
+                    "preview_length": 1000
+                }),
+                ("search_graphql_elements", {
+                    "query": "customer",
+                    "element_type": "mutation",
+                    "preview_length": 1200
+                }),
+                ("search_documentation", {
+                    "queries": ["customer", "token"],
+                    "preview_length": 1000
+                }),
+                ("search_graphql_elements", {
+                    "query": "updateCustomerAddress",
+                    "preview_length": 800
+                }),
+                ("search_examples", {
+                    "query": "customer",
+                    "language": "json",
+                    "preview_length": 1000
+                }),
+            ]),
+            create_customer_lookup(),
+            customer_query_document(),
+        )
+
+        # Example 1: Search for customer documentation
+        print_section("Example 1: Search for Customer Documentation")
+        print(customer_docs.content[0].text)
+        print("\n... (truncated for readability)")
+
+        # Example 2: Find customer mutations
+        print_section("Example 2: Find Customer Mutations")
+        print(customer_mutations.content[0].text)
+        print("\n... (truncated for readability)")
+
+        # Example 3: Get createCustomer mutation details
+        print_section("Example 3: Get 'createCustomer' Mutation Details")
+        if create_customer_examples is not None:
+            print("Note: createCustomer not found as extracted element.")
+            print("Searching for customer creation examples instead...\n")
+            print(create_customer_examples.content[0].text)
+        else:
+            print(create_customer.content[0].text)
+
+        print("\n... (truncated for readability)")
+
+        # Example 4: Search for customer authentication examples
+        print_section("Example 4: Search for Customer Authentication")
+        print(auth_docs.content[0].text)
+        print("\n... (truncated for readability)")
+
+        # Example 5: Find customer address mutation examples
+        print_section("Example 5: Find Customer Address Mutations")
+        print(address_mutations.content[0].text)
+        print("\n... (truncated for readability)")
+
+        # Example 6: Get specific customer documentation
+        print_section("Example 6: Get Customer Query Document")
+        if file_path:
+            print(f"Found customer documentation at: {file_path}\n")
+            print(customer_document.content[0].text)
             print("\n... (truncated for readability)")
-
-            print_section("Summary")
-            print("✓ Searched customer documentation")
-            print("✓ Found customer mutations")
-            print("✓ Located customer creation examples")
-            print("✓ Found authentication documentation")
-            print("✓ Retrieved address mutation details")
-            print("✓ Explored specific customer documents")
-            print("✓ Found JSON response examples")
-            print("\n🎉 All customer query examples completed successfully!\n")
+        else:
+            print("Could not extract file path from search results")
+
+        # Example 7: Find customer code examples
+        print_section("Example 7: Find Customer JSON Response Examples")
+        print(json_examples.content[0].text)
+        print("\n... (truncated for readability)")
+
+        print_section("Summary")
+        print("✓ Searched customer documentation")
+        print("✓ Found customer mutations")
+        print("✓ Located customer creation examples")
+        print("✓ Found authentication documentation")
+        print("✓ Retrieved address mutation details")
+        print("✓ Explored specific customer documents")
+        print("✓ Found JSON response examples")
+        print("\n🎉 All customer query examples completed successfully!\n")
 
     return 0
 
 
 if __name__ == "__main__":
     try:
-        sys.exit(asyncio.run(main()))
+        sys.exit(run(main))
     except KeyboardInterrupt:
         print("\n\nInterrupted by user")
         sys.exit(1)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Run all MCP server usage examples in one process.
+
+The examples share a single server connection, so the server is spawned
+and its ingestion check runs only once for the whole set.
+"""
+import sys
+
+import example_cart_checkout
+import example_customer
+import example_products
+from _common import run, shared_session
+
+EXAMPLES = (
+    ("Product Query Examples", example_products.main),
+    ("Customer Query Examples", example_customer.main),
+    ("Cart & Checkout Examples", example_cart_checkout.main),
+)
+
+
+def announced(index, title, main):
+    """Wrap an example main so it prints its position in the run first"""
+    async def wrapper():
+        if index > 1:
+            print("\n")
+        print(f"{index}/{len(EXAMPLES)}: Running {title}...")
+        print("=" * 72)
+        return await main()
+    return wrapper
+
+
+async def report_cache():
+    """Show how many tool calls were answered from the shared result cache"""
+    async with shared_session() as session:
+        print(
+            f"Tool result cache: {session.hits} repeated calls served from cache, "
+            f"{session.misses} sent to the server"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(run(
+            *(
+                announced(index, title, main)
+                for index, (title, main) in enumerate(EXAMPLES, 1)
+            ),
+            report_cache,
+        ))
+    except KeyboardInterrupt:
+        print("\n\nInterrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -26,21 +26,8 @@ if [ -z "$MAGENTO_GRAPHQL_DOCS_PATH" ] && [ ! -L "$SCRIPT_DIR/../data" ]; then
     echo ""
 fi
 
-echo "1/3: Running Product Query Examples..."
-echo "========================================================================"
-python3 "$SCRIPT_DIR/example_products.py"
-
-echo ""
-echo ""
-echo "2/3: Running Customer Query Examples..."
-echo "========================================================================"
-python3 "$SCRIPT_DIR/example_customer.py"
-
-echo ""
-echo ""
-echo "3/3: Running Cart & Checkout Examples..."
-echo "========================================================================"
-python3 "$SCRIPT_DIR/example_cart_checkout.py"
+# One process and one server connection for all three examples
+python3 "$SCRIPT_DIR/run_all.py"
 
 echo ""
 echo "========================================================================"
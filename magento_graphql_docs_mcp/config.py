@@ -1,7 +1,42 @@
+import functools
 import os
 import sys
 from pathlib import Path
+from typing import Final
 
+
+class ConfigError(ValueError):
+    """Raised when a configuration environment variable is invalid"""
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer environment variable, falling back to default if unset"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ConfigError(f"{name}={value!r} is not an integer") from None
+
+
+_TRUE = ("1", "true", "yes", "on")
+_FALSE = ("", "0", "false", "no", "off")
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean environment variable such as 1/0 or true/false"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    if value.strip().lower() in _TRUE:
+        return True
+    if value.strip().lower() in _FALSE:
+        return False
+    raise ConfigError(f"{name}={value!r} is not a boolean (use 1 or 0)")
+
+
+@functools.lru_cache(maxsize=1)
 def get_db_path() -> str:
     """
     Determines the database path.
@@ -11,15 +46,24 @@ def get_db_path() -> str:
     """
     env_path = os.environ.get("MAGENTO_GRAPHQL_DOCS_DB_PATH")
     if env_path:
-        db_path = Path(env_path)
+        db_path = os.path.normpath(env_path)
     else:
-        db_path = Path.home() / ".mcp" / "magento-graphql-docs" / "database.db"
+        db_path = os.path.join(os.path.expanduser("~"), ".mcp", "magento-graphql-docs", "database.db")
 
     # Ensure directory exists
-    db_path.parent.mkdir(parents=True, exist_ok=True)
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+
+    return db_path
 
-    return str(db_path)
+def _has_markdown(directory: str) -> bool:
+    """Check whether a directory directly contains a .md file, stopping at the first hit"""
+    with os.scandir(directory) as entries:
+        return any(entry.name.endswith(".md") for entry in entries)
 
+
+@functools.lru_cache(maxsize=1)
 def get_docs_path() -> str:
     """
     Determines the GraphQL documentation directory path.
@@ -31,32 +75,33 @@ def get_docs_path() -> str:
 
     Validates that the path exists and contains documentation files.
     Raises FileNotFoundError with helpful message if not found.
+    The result is cached, so the filesystem is only probed once per process.
     """
     # Priority 1: Environment variable
     env_path = os.environ.get("MAGENTO_GRAPHQL_DOCS_PATH")
     if env_path:
-        path = Path(env_path).resolve()
-        if not path.exists():
+        path = os.path.realpath(env_path)
+        if not os.path.exists(path):
             print(f"ERROR: MAGENTO_GRAPHQL_DOCS_PATH set to '{env_path}' but directory does not exist", file=sys.stderr)
             raise FileNotFoundError(
                 f"Documentation directory not found: {env_path}\n"
                 f"The MAGENTO_GRAPHQL_DOCS_PATH environment variable points to a non-existent directory.\n"
                 f"Please verify the path or unset the variable to use auto-detection."
             )
-        return str(path)
+        return path
 
     # Priority 2: ./data/ directory (relative to project root)
-    package_dir = Path(__file__).parent.parent
-    data_path = package_dir / "data"
-    if data_path.exists():
+    package_dir = os.path.dirname(os.path.dirname(__file__))
+    data_path = os.path.join(package_dir, "data")
+    if os.path.exists(data_path):
         # Check if it's a symlink or directory with content
-        if data_path.is_symlink() or (data_path.is_dir() and list(data_path.glob("*.md"))):
-            return str(data_path.resolve())
+        if os.path.islink(data_path) or (os.path.isdir(data_path) and _has_markdown(data_path)):
+            return os.path.realpath(data_path)
 
     # Priority 3: Sibling commerce-webapi directory
-    sibling_path = package_dir.parent / "commerce-webapi" / "src" / "pages" / "graphql"
-    if sibling_path.exists():
-        return str(sibling_path)
+    sibling_path = os.path.join(os.path.dirname(package_dir), "commerce-webapi", "src", "pages", "graphql")
+    if os.path.exists(sibling_path):
+        return sibling_path
 
     # No valid path found - provide helpful error message
     error_msg = (
@@ -69,19 +114,31 @@ def get_docs_path() -> str:
         f"   cd {package_dir}\n"
         f"   ln -s /path/to/commerce-webapi/src/pages/graphql data\n\n"
         "3. Clone commerce-webapi as sibling directory:\n"
-        f"   cd {package_dir.parent}\n"
+        f"   cd {Path(package_dir).parent}\n"
         "   git clone https://github.com/AdobeDocs/commerce-webapi.git\n\n"
         "For detailed setup instructions, see SETUP.md"
     )
     print(f"ERROR: {error_msg}", file=sys.stderr)
     raise FileNotFoundError(error_msg)
 
-# Configuration values
-DB_PATH = get_db_path()
-DOCS_PATH = get_docs_path()
+# Configuration values (resolved lazily on first access, see __getattr__)
+_LAZY_PATHS = {
+    "DB_PATH": get_db_path,
+    "DOCS_PATH": get_docs_path,
+}
+
+
+def __getattr__(name: str) -> str:
+    """Resolve DB_PATH and DOCS_PATH on first access (PEP 562)"""
+    try:
+        return _LAZY_PATHS[name]()
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
 
 # Configurable constants
-DB_TOP_K = int(os.environ.get("MAGENTO_GRAPHQL_DOCS_TOP_K", "5"))
-MAX_FIELDS_PER_ELEMENT = int(os.environ.get("MAGENTO_GRAPHQL_DOCS_MAX_FIELDS", "20"))
-MAX_CODE_PREVIEW_LENGTH = int(os.environ.get("MAGENTO_GRAPHQL_DOCS_CODE_PREVIEW", "400"))
-SEARCH_RESULT_MULTIPLIER = 2  # Fetch 2x results before filtering
+DB_TOP_K: Final[int] = _env_int("MAGENTO_GRAPHQL_DOCS_TOP_K", 5)
+MAX_FIELDS_PER_ELEMENT: Final[int] = _env_int("MAGENTO_GRAPHQL_DOCS_MAX_FIELDS", 20)
+MAX_CODE_PREVIEW_LENGTH: Final[int] = _env_int("MAGENTO_GRAPHQL_DOCS_CODE_PREVIEW", 400)
+DB_CONCURRENCY: Final[int] = max(1, _env_int("MAGENTO_GRAPHQL_DOCS_DB_CONCURRENCY", 4))
+IN_MEMORY: Final[bool] = _env_flag("MAGENTO_GRAPHQL_DOCS_IN_MEMORY")
+FORCE_REINGEST: Final[bool] = _env_flag("MAGENTO_GRAPHQL_DOCS_FORCE_REINGEST")
@@ -1,31 +1,92 @@
-import json
+import asyncio
 import logging
+import zlib
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import List, Tuple
+import orjson
 from sqlite_utils import Database
-from .parser import MarkdownDocParser
-from .config import DB_PATH, DOCS_PATH
+from .parser import CodeBlock, Document, GraphQLElement, MarkdownDocParser, scandir_md
+from . import config
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-
-def should_reingest(db: Database, docs_path: str) -> bool:
-    """
-    Determine if we need to reingest based on directory modification time.
+# Bump whenever the tables or FTS configuration change. A database built
+# with a different version is dropped and rebuilt on the next startup.
+SCHEMA_VERSION = 9
+
+# Every table created by create_tables, FTS indexes before their content tables
+SCHEMA_TABLES = (
+    "documents_fts",
+    "graphql_elements_fts",
+    "code_blocks_fts",
+    "category_stats",
+    "code_blocks",
+    "document_keywords",
+    "graphql_elements",
+    "documents",
+    "metadata",
+)
+
+# Bulk-load statements for the fixed schema created by create_tables.
+# Rows are built as tuples in this column order by the *_row helpers.
+INSERT_DOCUMENT_SQL = """
+    INSERT INTO documents (
+        id, file_path, title, description, keywords_json, category,
+        subcategory, content_type, searchable_text, headers_json,
+        last_modified, content_md, formatted_md
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_CODE_BLOCK_SQL = """
+    INSERT INTO code_blocks (document_id, language, code, context, line_number)
+    VALUES (?, ?, ?, ?, ?)
+"""
+INSERT_ELEMENT_SQL = """
+    INSERT INTO graphql_elements (
+        document_id, element_type, name, fields_json, parameters_json,
+        return_type, description, searchable_text, doc_title, doc_path
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# get_document output, see format_document
+DOCUMENT_TEMPLATE = """\
+# {title}
+
+**Path:** {file_path}
+**Category:** {category}/{subcategory}
+**Type:** {content_type}
+**Keywords:** {keywords}
+
+{description}---
+
+{content}"""
+
+
+def scan_docs(docs_path: str) -> Tuple[List[Path], str]:
     """
-    docs_dir = Path(docs_path)
+    Walk the documentation tree once.
 
-    if not docs_dir.exists():
-        logger.error(f"Documentation directory not found: {docs_path}")
-        return False
+    Returns the markdown files and the latest file modification time as
+    an ISO timestamp, used both for the reingest check and the metadata.
+    """
+    files = []
+    latest_mtime = 0
+    for entry in scandir_md(docs_path):
+        files.append(Path(entry.path))
+        latest_mtime = max(latest_mtime, entry.stat().st_mtime)
 
-    # Get directory modification time (recursively check all files)
-    latest_mtime = max(
-        (f.stat().st_mtime for f in docs_dir.rglob("*.md")),
-        default=0
-    )
     latest_mtime_iso = datetime.fromtimestamp(latest_mtime, tz=timezone.utc).isoformat()
+    return files, latest_mtime_iso
+
+
+def should_reingest(db: Database, latest_mtime_iso: str) -> bool:
+    """
+    Determine if we need to reingest based on directory modification time.
+    """
+    if config.FORCE_REINGEST:
+        logger.info("MAGENTO_GRAPHQL_DOCS_FORCE_REINGEST is set, will reingest")
+        return True
 
     # Check if metadata table exists
     if "metadata" not in db.table_names():
@@ -37,6 +98,10 @@ def should_reingest(db: Database, docs_path: str) -> bool:
         metadata = db["metadata"].get("last_ingestion")
         last_docs_mtime = metadata.get("docs_directory_mtime")
 
+        if metadata.get("schema_version") != SCHEMA_VERSION:
+            logger.info("Database schema changed, will rebuild")
+            return True
+
         if last_docs_mtime == latest_mtime_iso:
             logger.info("Documentation unchanged, skipping ingestion")
             return False
@@ -48,10 +113,31 @@ def should_reingest(db: Database, docs_path: str) -> bool:
         return True
 
 
+def drop_stale_tables(db: Database) -> None:
+    """Drop all tables if they were built with a different SCHEMA_VERSION"""
+    try:
+        schema_version = db["metadata"].get("last_ingestion").get("schema_version")
+    except Exception:
+        # No metadata yet: either a new database or an interrupted first run
+        schema_version = None
+
+    if schema_version == SCHEMA_VERSION:
+        return
+
+    existing = set(db.table_names())
+    if existing.intersection(SCHEMA_TABLES):
+        logger.info(f"Dropping tables from schema version {schema_version}, current is {SCHEMA_VERSION}")
+        for table in SCHEMA_TABLES:
+            if table in existing:
+                db[table].drop()
+
+
 def create_tables(db: Database) -> None:
     """Create database schema"""
     logger.info("Creating database tables...")
 
+    drop_stale_tables(db)
+
     # Metadata table
     if "metadata" not in db.table_names():
         db["metadata"].create({
@@ -59,6 +145,7 @@ def create_tables(db: Database) -> None:
             "docs_directory_mtime": str,
             "total_files": int,
             "ingestion_time": str,
+            "schema_version": int,
         }, pk="key")
 
     # Documents table
@@ -75,10 +162,11 @@ def create_tables(db: Database) -> None:
             "searchable_text": str,
             "headers_json": str,
             "last_modified": str,
-            "content_md": str,
+            "content_md": bytes,  # zlib-compressed, see document_row
+            "formatted_md": bytes,  # zlib-compressed get_document output
         }, pk="id")
-        db["documents"].create_index(["category"])
-        db["documents"].create_index(["subcategory"])
+        db["documents"].create_index(["file_path"], unique=True)
+        db["documents"].create_index(["category", "subcategory"])
         db["documents"].create_index(["content_type"])
 
     # Code blocks table
@@ -91,9 +179,25 @@ def create_tables(db: Database) -> None:
             "context": str,
             "line_number": int,
         }, pk="id")
-        db["code_blocks"].create_index(["document_id"])
+        db["code_blocks"].create_index(["document_id", "language"])
         db["code_blocks"].create_index(["language"])
 
+    # Document counts per category, precomputed for list_categories
+    if "category_stats" not in db.table_names():
+        db["category_stats"].create({
+            "category": str,
+            "subcategory": str,
+            "count": int,
+        })
+
+    # Document keywords, one row per keyword, for related document lookups
+    if "document_keywords" not in db.table_names():
+        db["document_keywords"].create({
+            "document_id": str,
+            "keyword": str,
+        })
+        db["document_keywords"].create_index(["keyword", "document_id"])
+
     # GraphQL elements table
     if "graphql_elements" not in db.table_names():
         db["graphql_elements"].create({
@@ -106,128 +210,206 @@ def create_tables(db: Database) -> None:
             "return_type": str,
             "description": str,
             "searchable_text": str,
+            # Copied from the source document, so element results need
+            # no join back to documents
+            "doc_title": str,
+            "doc_path": str,
         }, pk="id")
         db["graphql_elements"].create_index(["document_id"])
         db["graphql_elements"].create_index(["element_type"])
-        db["graphql_elements"].create_index(["name"])
+        db["graphql_elements"].create_index(["name", "element_type"])
 
-    # Create FTS5 indexes
+    # Create FTS5 indexes. They are rebuilt in one pass after each bulk
+    # load rather than kept in sync row by row with triggers.
+    # Documents are prose, so they use a stemming word tokenizer, which
+    # keeps the index small and matches word variants (cart/carts).
     if "documents_fts" not in db.table_names():
         db["documents"].enable_fts(
             ["searchable_text"],
-            create_triggers=True,
-            tokenize="trigram"
+            create_triggers=False,
+            tokenize="porter unicode61 remove_diacritics 2"
         )
         logger.info("Created FTS index for documents")
 
+    # GraphQL element text is mostly camelCase identifiers, where substring
+    # matches matter ("cart" -> addProductsToCart), so it stays on trigram
     if "graphql_elements_fts" not in db.table_names():
         db["graphql_elements"].enable_fts(
             ["searchable_text"],
-            create_triggers=True,
+            create_triggers=False,
             tokenize="trigram"
         )
         logger.info("Created FTS index for graphql_elements")
 
+    # Code examples are searched by substring (a field or mutation name
+    # anywhere in the code or its context), so they use trigram as well
+    if "code_blocks_fts" not in db.table_names():
+        db["code_blocks"].enable_fts(
+            ["code", "context"],
+            create_triggers=False,
+            tokenize="trigram"
+        )
+        logger.info("Created FTS index for code_blocks")
+
+
+def tune_for_bulk_load(db: Database) -> None:
+    """Apply connection PRAGMAs suited to a full rewrite of the database"""
+    db.conn.execute("PRAGMA journal_mode=WAL")
+    db.conn.execute("PRAGMA synchronous=NORMAL")
+    db.conn.execute("PRAGMA temp_store=MEMORY")
+    db.conn.execute("PRAGMA cache_size=-64000")
+
+
+def format_document(doc: Document) -> str:
+    """Render a document as returned by the get_document tool"""
+    return DOCUMENT_TEMPLATE.format(
+        title=doc.title,
+        file_path=doc.file_path,
+        category=doc.category,
+        subcategory=doc.subcategory,
+        content_type=doc.content_type,
+        keywords=', '.join(map(str, doc.keywords)) if doc.keywords else 'None',
+        description=f"**Description:** {doc.description}\n\n" if doc.description else "",
+        content=doc.content_md,
+    )
 
-def ingest_data(db: Database, parser: MarkdownDocParser) -> None:
-    """Ingest parsed data into database"""
-    logger.info("Parsing all documentation files...")
-
-    # Parse all files
-    documents, code_blocks, graphql_elements = parser.parse_all()
-
-    # Clear existing data
-    logger.info("Clearing existing data...")
-    db["code_blocks"].delete_where()
-    db["graphql_elements"].delete_where()
-    db["documents"].delete_where()
-
-    # Insert documents
-    logger.info(f"Inserting {len(documents)} documents...")
-    doc_records = []
-    for doc in documents:
-        doc_records.append({
-            "id": doc.id,
-            "file_path": doc.file_path,
-            "title": doc.title,
-            "description": doc.description,  # Allow NULL for missing descriptions
-            "keywords_json": json.dumps(doc.keywords),
-            "category": doc.category,
-            "subcategory": doc.subcategory,  # Allow NULL for missing subcategories
-            "content_type": doc.content_type,
-            "searchable_text": doc.searchable_text,
-            "headers_json": json.dumps(doc.headers),
-            "last_modified": doc.last_modified.isoformat(),
-            "content_md": doc.content_md,
-        })
-
-    if doc_records:
-        db["documents"].insert_all(doc_records)
-        logger.info(f"Inserted {len(doc_records)} documents")
-
-    # Insert code blocks
-    logger.info(f"Inserting {len(code_blocks)} code blocks...")
-    code_block_records = []
-    for block in code_blocks:
-        code_block_records.append({
-            "document_id": block.document_id,
-            "language": block.language,
-            "code": block.code,
-            "context": block.context,  # Allow NULL for missing context
-            "line_number": block.line_number,
-        })
 
-    if code_block_records:
-        db["code_blocks"].insert_all(code_block_records)
-        logger.info(f"Inserted {len(code_block_records)} code blocks")
-
-    # Insert GraphQL elements
-    logger.info(f"Inserting {len(graphql_elements)} GraphQL elements...")
-    element_records = []
-    for element in graphql_elements:
-        element_records.append({
-            "document_id": element.document_id,
-            "element_type": element.element_type,
-            "name": element.name,
-            "fields_json": json.dumps(element.fields),
-            "parameters_json": json.dumps(element.parameters),
-            "return_type": element.return_type,  # Allow NULL for missing return type
-            "description": element.description,  # Allow NULL for missing description
-            "searchable_text": element.searchable_text,
-        })
+def document_row(doc: Document) -> tuple:
+    """Values for INSERT_DOCUMENT_SQL"""
+    return (
+        doc.id,
+        doc.file_path,
+        doc.title,
+        doc.description,  # Allow NULL for missing descriptions
+        orjson.dumps(doc.keywords).decode(),
+        doc.category,
+        doc.subcategory,  # Allow NULL for missing subcategories
+        doc.content_type,
+        doc.searchable_text,
+        orjson.dumps(doc.headers).decode(),
+        doc.last_modified.isoformat(),
+        # The raw markdown is only returned, never searched (that is
+        # searchable_text), so it is stored compressed. Level 1 is cheap
+        # and already shrinks markdown about 3x.
+        zlib.compress(doc.content_md.encode('utf-8'), 1),
+        # Documents never change after ingestion, so get_document's
+        # output is rendered once here
+        zlib.compress(format_document(doc).encode('utf-8'), 1),
+    )
 
-    if element_records:
-        db["graphql_elements"].insert_all(element_records)
-        logger.info(f"Inserted {len(element_records)} GraphQL elements")
 
+def code_block_row(block: CodeBlock) -> tuple:
+    """Values for INSERT_CODE_BLOCK_SQL"""
+    return (
+        block.document_id,
+        block.language,
+        block.code,
+        block.context,  # Allow NULL for missing context
+        block.line_number,
+    )
 
-def update_metadata(db: Database, docs_path: str, total_files: int) -> None:
-    """Update metadata after successful ingestion"""
-    docs_dir = Path(docs_path)
 
-    # Get latest modification time
-    latest_mtime = max(
-        (f.stat().st_mtime for f in docs_dir.rglob("*.md")),
-        default=0
+def element_row(element: GraphQLElement, doc: Document) -> tuple:
+    """Values for INSERT_ELEMENT_SQL, for an element of doc"""
+    return (
+        element.document_id,
+        element.element_type,
+        element.name,
+        orjson.dumps(element.fields).decode(),
+        orjson.dumps(element.parameters).decode(),
+        element.return_type,  # Allow NULL for missing return type
+        element.description,  # Allow NULL for missing description
+        element.searchable_text,
+        doc.title,
+        doc.file_path,
     )
-    latest_mtime_iso = datetime.fromtimestamp(latest_mtime, tz=timezone.utc).isoformat()
 
+
+def ingest_data(db: Database, parser: MarkdownDocParser, files: List[Path]) -> None:
+    """Ingest parsed data into database"""
+    tune_for_bulk_load(db)
+
+    # Replace all rows in one transaction: a single commit instead of one
+    # per statement, and readers never see a half-empty database. Every
+    # write goes straight to db.conn, since sqlite-utils table helpers
+    # (delete_where, rebuild_fts) may commit on their own.
+    with db.conn:
+        db.conn.execute("BEGIN")
+
+        # Clear existing data
+        logger.info("Clearing existing data...")
+        for table in ("category_stats", "code_blocks", "document_keywords", "graphql_elements", "documents"):
+            db.conn.execute(f"DELETE FROM [{table}]")
+
+        # Parse and insert file by file, so only one file's data is held
+        # in memory at a time
+        logger.info("Parsing and inserting all documentation files...")
+        total_documents = total_code_blocks = total_elements = 0
+        for doc, code_blocks, graphql_elements in parser.iter_parsed(files):
+            db.conn.execute(INSERT_DOCUMENT_SQL, document_row(doc))
+            db.conn.executemany(INSERT_CODE_BLOCK_SQL, map(code_block_row, code_blocks))
+            db.conn.executemany(
+                INSERT_ELEMENT_SQL,
+                (element_row(element, doc) for element in graphql_elements)
+            )
+
+            total_documents += 1
+            total_code_blocks += len(code_blocks)
+            total_elements += len(graphql_elements)
+
+        logger.info(f"Inserted {total_documents} documents, {total_code_blocks} code blocks, {total_elements} GraphQL elements")
+
+        # Split the stored keyword lists into one indexed row per keyword
+        db.conn.execute("""
+            INSERT INTO document_keywords (document_id, keyword)
+            SELECT DISTINCT d.id, k.value FROM documents d, json_each(d.keywords_json) k
+        """)
+
+        # The documents never change after ingestion, so aggregate once here
+        db.conn.execute("""
+            INSERT INTO category_stats (category, subcategory, count)
+            SELECT category, subcategory, COUNT(*) FROM documents
+            GROUP BY category, subcategory
+        """)
+
+        # Index all loaded rows at once
+        logger.info("Rebuilding full-text indexes...")
+        for fts_table in ("documents_fts", "graphql_elements_fts", "code_blocks_fts"):
+            db.conn.execute(f"INSERT INTO [{fts_table}] ([{fts_table}]) VALUES ('rebuild')")
+
+        # Refresh planner statistics for the new contents
+        db.conn.execute("ANALYZE")
+
+
+def update_metadata(db: Database, latest_mtime_iso: str, total_files: int) -> None:
+    """Update metadata after successful ingestion"""
     db["metadata"].upsert({
         "key": "last_ingestion",
         "docs_directory_mtime": latest_mtime_iso,
         "total_files": total_files,
         "ingestion_time": datetime.now(timezone.utc).isoformat(),
+        "schema_version": SCHEMA_VERSION,
     }, pk="key")
 
 
-async def ingest_graphql_docs() -> None:
-    """Main ingestion function to be called on server startup"""
+def _do_ingest() -> None:
+    """Synchronous ingestion core: scan, parse and load the documentation"""
     logger.info("Starting GraphQL documentation ingestion...")
 
-    db = Database(DB_PATH)
+    # Resolved here rather than at import so that importing the server
+    # does not validate the documentation path
+    docs_path = config.DOCS_PATH
+    db = Database(config.DB_PATH)
+
+    if not Path(docs_path).exists():
+        logger.error(f"Documentation directory not found: {docs_path}")
+        return
+
+    # Single walk of the docs tree, shared by every step below
+    files, latest_mtime_iso = scan_docs(docs_path)
 
     # Check if we need to reingest
-    if not should_reingest(db, DOCS_PATH):
+    if not should_reingest(db, latest_mtime_iso):
         logger.info("Skipping ingestion, data is up to date")
         return
 
@@ -235,18 +417,16 @@ async def ingest_graphql_docs() -> None:
     create_tables(db)
 
     # Parse documentation
-    parser = MarkdownDocParser(DOCS_PATH)
+    parser = MarkdownDocParser(docs_path)
 
     try:
-        # Get file count before parsing
-        files = parser.walk_directory()
-        total_files = len(files)
+        logger.info(f"Found {len(files)} markdown files")
 
         # Ingest data
-        ingest_data(db, parser)
+        ingest_data(db, parser, files)
 
         # Update metadata
-        update_metadata(db, DOCS_PATH, total_files)
+        update_metadata(db, latest_mtime_iso, len(files))
 
         logger.info("GraphQL documentation ingestion complete")
     except FileNotFoundError as e:
@@ -257,6 +437,13 @@ async def ingest_graphql_docs() -> None:
         raise
 
 
+async def ingest_graphql_docs() -> None:
+    """Main ingestion function to be called on server startup"""
+    # Parsing and loading are blocking, so run them in a worker thread and
+    # keep the event loop free while they run. The SQLite connection is
+    # created and used only within that thread.
+    await asyncio.to_thread(_do_ingest)
+
+
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(ingest_graphql_docs())
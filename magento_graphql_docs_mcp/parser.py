@@ -1,34 +1,74 @@
 import hashlib
 import logging
+import multiprocessing
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional, Tuple
-from pydantic import BaseModel, Field
+from typing import Iterator, List, Optional, Tuple
 import frontmatter
 from .config import MAX_FIELDS_PER_ELEMENT
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Files handed to each parser worker process at a time
+PARSE_CHUNKSIZE = 16
 
-class Document(BaseModel):
+# Start method for parse workers. Ingestion runs in a worker thread of an
+# already multi-threaded server, and forking such a process can leave the
+# child holding locks (e.g. logging's) that no thread will ever release.
+PARSE_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Patterns used for every file and code block, compiled once
+
+# A fenced block: opening fence line with its info string, then whole code
+# lines (each with its leading newline) up to the first line starting with
+# ``` or the end of the document, then the closing fence line if present
+_RE_FENCE = re.compile(
+    r'^[^\S\n]*```([^\n]*)((?:\n(?![^\S\n]*```)[^\n]*)*)(?:\n[^\S\n]*```[^\n]*)?',
+    re.MULTILINE
+)
+
+# Markup dropped from searchable text. Fenced blocks go first, on their
+# own, so a stray backtick in prose can never pair with a fence; inline
+# code and links ([text](url) -> text) then share one pass.
+_RE_FENCED = re.compile(r'```[\s\S]*?```')
+_RE_CLEAN = re.compile(r'`[^`]+`|\[([^\]]+)\]\([^\)]+\)')
+_RE_WS = re.compile(r'\s+')
+
+_RE_HEADER = re.compile(r'^[^\S\n]*#+([^\n]*)', re.MULTILINE)
+
+# Element kinds in the order they are emitted for a code block. The name
+# is captured in a lookahead so one declaration never hides the next.
+_GQL_KINDS = ("query", "mutation", "type", "interface")
+_RE_GQL_DECL = re.compile(r'\b(query|mutation|type|interface)\s+(?=(\w+))')
+_RE_FIELD = re.compile(r'\b([a-z_]\w*)\s*(?:\(|:|\{)', re.IGNORECASE)
+_RE_PARAM = re.compile(r'\$(\w+)\s*:')
+
+
+@dataclass(slots=True, kw_only=True)
+class Document:
     """Represents a documentation page"""
-    id: str  # SHA256 hash of file_path
+    id: str  # BLAKE2b (128-bit) hash of file_path
     file_path: str  # Relative to docs root
     title: str
     description: Optional[str] = None
-    keywords: List[str] = Field(default_factory=list)
+    keywords: List[str] = field(default_factory=list)
     category: str  # e.g., "schema", "develop", "usage"
     subcategory: Optional[str] = None  # e.g., "products", "cart"
     content_type: str  # "guide", "reference", "tutorial", "schema"
     searchable_text: str  # Combined: title + description + content
-    headers: List[str] = Field(default_factory=list)  # All markdown headers
+    headers: List[str] = field(default_factory=list)  # All markdown headers
     last_modified: datetime
     content_md: str  # Full markdown content
 
 
-class CodeBlock(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class CodeBlock:
     """Represents a code example"""
     document_id: str
     language: str  # graphql, json, javascript, bash
@@ -37,18 +77,49 @@ class CodeBlock(BaseModel):
     line_number: int
 
 
-class GraphQLElement(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class GraphQLElement:
     """Represents a GraphQL schema element"""
     document_id: str
     element_type: str  # query, mutation, type, interface, union
     name: str
-    fields: List[str] = Field(default_factory=list)
-    parameters: List[str] = Field(default_factory=list)
+    fields: List[str] = field(default_factory=list)
+    parameters: List[str] = field(default_factory=list)
     return_type: Optional[str] = None
     description: Optional[str] = None
     searchable_text: str
 
 
+# A parsed file: the document with its code blocks and GraphQL elements
+ParsedFile = Tuple[Document, List[CodeBlock], List[GraphQLElement]]
+
+
+def scandir_md(path: str) -> Iterator[os.DirEntry]:
+    """
+    Recursively yield DirEntry objects for .md files under path.
+
+    Files in a directory come before its subdirectories, and symlinked
+    directories are not followed (same as Path.rglob). DirEntry caches
+    its stat result, so callers can read mtimes without extra syscalls.
+    """
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.endswith('.md') and entry.is_file():
+                yield entry
+
+    for subdir in subdirs:
+        yield from scandir_md(subdir)
+
+
+def _clean_replacement(match: re.Match) -> str:
+    """Keep the text of a markdown link and drop inline code"""
+    text = match.group(1)
+    return text.replace('`', '') if text else ''
+
+
 class MarkdownDocParser:
     """Parse markdown documentation files"""
 
@@ -59,20 +130,25 @@ class MarkdownDocParser:
 
     def walk_directory(self) -> List[Path]:
         """Find all .md files recursively"""
-        md_files = list(self.docs_root.rglob("**/*.md"))
+        md_files = [Path(entry.path) for entry in scandir_md(self.docs_root)]
         logger.info(f"Found {len(md_files)} markdown files")
         return md_files
 
     def parse_file(self, file_path: Path) -> Document:
         """Parse single markdown file"""
-        # Read file content
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Parse frontmatter
-        post = frontmatter.loads(content)
-        metadata = post.metadata
-        markdown_content = post.content
+        # Read file content in one read and one bulk decode, keeping the
+        # newline normalization that text mode used to provide
+        content = file_path.read_bytes().decode('utf-8')
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+
+        # Parse frontmatter. Only text opening with a YAML (---) or JSON ({)
+        # block can carry any, so everything else skips the handlers.
+        content = content.strip()
+        if content.startswith(('---', '{')):
+            metadata, markdown_content = frontmatter.parse(content)
+        else:
+            metadata, markdown_content = {}, content
 
         # Get file stats
         stat = file_path.stat()
@@ -82,7 +158,7 @@ class MarkdownDocParser:
         rel_path = str(file_path.relative_to(self.docs_root))
 
         # Generate document ID
-        doc_id = hashlib.sha256(rel_path.encode('utf-8')).hexdigest()
+        doc_id = hashlib.blake2b(rel_path.encode('utf-8'), digest_size=16).hexdigest()
 
         # Extract category and subcategory from path
         category, subcategory = self.extract_category_from_path(file_path)
@@ -90,8 +166,11 @@ class MarkdownDocParser:
         # Determine content type
         content_type = self.determine_content_type(category, rel_path)
 
+        # Extract headers
+        headers = self.extract_headers(markdown_content)
+
         # Extract title (from frontmatter or first header)
-        title = metadata.get('title', self.extract_first_header(markdown_content) or rel_path)
+        title = metadata.get('title', headers[0] if headers else rel_path)
 
         # Extract description
         description = metadata.get('description')
@@ -101,9 +180,6 @@ class MarkdownDocParser:
         if isinstance(keywords, str):
             keywords = [keywords]
 
-        # Extract headers
-        headers = self.extract_headers(markdown_content)
-
         # Build searchable text
         searchable_text = self.build_searchable_text(
             title, description, markdown_content, keywords, headers
@@ -155,26 +231,10 @@ class MarkdownDocParser:
         else:
             return "guide"
 
-    def extract_first_header(self, markdown: str) -> Optional[str]:
-        """Extract first markdown header as fallback title"""
-        for line in markdown.split('\n'):
-            line = line.strip()
-            if line.startswith('#'):
-                # Remove # symbols and strip whitespace
-                return line.lstrip('#').strip()
-        return None
-
     def extract_headers(self, markdown: str) -> List[str]:
         """Extract all markdown headers"""
-        headers = []
-        for line in markdown.split('\n'):
-            line = line.strip()
-            if line.startswith('#'):
-                # Remove # symbols and keep the text
-                header_text = line.lstrip('#').strip()
-                if header_text:
-                    headers.append(header_text)
-        return headers
+        # Keep the text after the # symbols, skipping empty headers
+        return [text for text in map(str.strip, _RE_HEADER.findall(markdown)) if text]
 
     def build_searchable_text(
         self,
@@ -205,187 +265,218 @@ class MarkdownDocParser:
     def clean_content(self, markdown: str) -> str:
         """Clean markdown content for search indexing"""
         # Remove code blocks
-        content = re.sub(r'```[\s\S]*?```', '', markdown)
+        content = _RE_FENCED.sub('', markdown)
 
-        # Remove inline code
-        content = re.sub(r'`[^`]+`', '', content)
-
-        # Remove markdown links but keep text [text](url) -> text
-        content = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', content)
+        # Remove inline code and replace markdown links with their text
+        content = _RE_CLEAN.sub(_clean_replacement, content)
 
         # Remove excessive whitespace
-        content = ' '.join(content.split())
-
-        return content
+        return _RE_WS.sub(' ', content).strip()
 
     def extract_code_blocks(self, markdown: str, doc_id: str) -> List[CodeBlock]:
         """Extract code blocks with language tags"""
         code_blocks = []
-        lines = markdown.split('\n')
-        i = 0
-        line_number = 0
-
-        while i < len(lines):
-            line = lines[i]
-
-            # Check for code block start
-            if line.strip().startswith('```'):
-                # Extract language
-                language = line.strip()[3:].strip().lower()
-                if not language:
-                    language = "text"
-
-                # Find code block end
-                code_lines = []
-                i += 1
-                start_line = i + 1
-
-                while i < len(lines) and not lines[i].strip().startswith('```'):
-                    code_lines.append(lines[i])
-                    i += 1
-
-                code = '\n'.join(code_lines)
-
-                # Extract context (previous paragraph)
-                context = self.extract_context(lines, start_line - 2)
+        fence_line = 0  # 0-based line index of the current opening fence
+        position = 0
+        search_from = 0
+
+        while True:
+            # Jump straight to the next backtick run, then anchor the fence
+            # pattern at the start of its line
+            candidate = markdown.find('```', search_from)
+            if candidate == -1:
+                break
+            match = _RE_FENCE.match(markdown, markdown.rfind('\n', 0, candidate) + 1)
+            if match is None:
+                # Backticks in the middle of a line, not a fence
+                search_from = candidate + 3
+                continue
+            search_from = match.end()
 
-                code_blocks.append(CodeBlock(
-                    document_id=doc_id,
-                    language=language,
-                    code=code,
-                    context=context,
-                    line_number=start_line
-                ))
+            fence_line += markdown.count('\n', position, match.start())
+            position = match.start()
 
-            i += 1
-            line_number += 1
+            code_blocks.append(CodeBlock(
+                document_id=doc_id,
+                language=match.group(1).strip().lower() or "text",
+                code=match.group(2)[1:],
+                context=self.extract_context(markdown, match.start()),
+                line_number=fence_line + 2  # 1-based line of the first code line
+            ))
 
         return code_blocks
 
-    def extract_context(self, lines: List[str], start_idx: int) -> Optional[str]:
+    def extract_context(self, markdown: str, fence_start: int) -> Optional[str]:
         """Extract context before code block (previous paragraph)"""
-        if start_idx < 0:
-            return None
-
-        # Look backwards for non-empty lines
+        # Look backwards over up to 5 lines preceding the fence
         context_lines = []
-        for i in range(start_idx, max(-1, start_idx - 5), -1):
-            line = lines[i].strip()
+        line_end = fence_start
+        for _ in range(5):
+            if line_end == 0:
+                break
+            line_start = markdown.rfind('\n', 0, line_end - 1) + 1
+            line = markdown[line_start:line_end - 1].strip()
+            line_end = line_start
+
+            if line.startswith('```'):
+                # Never borrow lines from a preceding code block
+                break
             if line and not line.startswith('#'):
-                context_lines.insert(0, line)
+                context_lines.append(line)
             elif context_lines:
                 # Stop at empty line or header
                 break
 
-        return ' '.join(context_lines) if context_lines else None
+        return ' '.join(reversed(context_lines)) if context_lines else None
 
     def extract_graphql_elements(self, code: str, doc_id: str) -> List[GraphQLElement]:
-        """Extract GraphQL queries/mutations/types from code blocks"""
-        elements = []
-
-        # Detect query
-        query_match = re.search(r'query\s+(\w+)', code)
-        if query_match:
-            name = query_match.group(1)
-            fields = self.extract_fields(code)
-            parameters = self.extract_parameters(code)
+        """Extract GraphQL queries/mutations/types/interfaces from code blocks"""
+        # First declaration of each kind, found in a single scan
+        declarations = {}
+        for match in _RE_GQL_DECL.finditer(code):
+            declarations.setdefault(match.group(1), match.group(2))
+            if len(declarations) == len(_GQL_KINDS):
+                break
 
-            elements.append(GraphQLElement(
-                document_id=doc_id,
-                element_type="query",
-                name=name,
-                fields=fields,
-                parameters=parameters,
-                searchable_text=f"query {name} {' '.join(fields)} {' '.join(parameters)}"
-            ))
+        if not declarations:
+            return []
 
-        # Detect mutation
-        mutation_match = re.search(r'mutation\s+(\w+)', code)
-        if mutation_match:
-            name = mutation_match.group(1)
-            fields = self.extract_fields(code)
+        # Fields and parameters come from the whole block, so they are
+        # extracted and joined once and shared by every element declared
+        # in it. Only queries and mutations carry parameters.
+        fields = self.extract_fields(code)
+        fields_text = ' '.join(fields)
+        parameters, parameters_text = [], ''
+        if 'query' in declarations or 'mutation' in declarations:
             parameters = self.extract_parameters(code)
+            parameters_text = ' '.join(parameters)
 
-            elements.append(GraphQLElement(
-                document_id=doc_id,
-                element_type="mutation",
-                name=name,
-                fields=fields,
-                parameters=parameters,
-                searchable_text=f"mutation {name} {' '.join(fields)} {' '.join(parameters)}"
-            ))
-
-        # Detect type
-        type_match = re.search(r'type\s+(\w+)', code)
-        if type_match:
-            name = type_match.group(1)
-            fields = self.extract_fields(code)
-
-            elements.append(GraphQLElement(
-                document_id=doc_id,
-                element_type="type",
-                name=name,
-                fields=fields,
-                searchable_text=f"type {name} {' '.join(fields)}"
-            ))
-
-        # Detect interface
-        interface_match = re.search(r'interface\s+(\w+)', code)
-        if interface_match:
-            name = interface_match.group(1)
-            fields = self.extract_fields(code)
+        elements = []
+        for kind in _GQL_KINDS:
+            name = declarations.get(kind)
+            if name is None:
+                continue
 
-            elements.append(GraphQLElement(
-                document_id=doc_id,
-                element_type="interface",
-                name=name,
-                fields=fields,
-                searchable_text=f"interface {name} {' '.join(fields)}"
-            ))
+            if kind in ("query", "mutation"):
+                elements.append(GraphQLElement(
+                    document_id=doc_id,
+                    element_type=kind,
+                    name=name,
+                    fields=fields,
+                    parameters=parameters,
+                    searchable_text=f"{kind} {name} {fields_text} {parameters_text}"
+                ))
+            else:
+                elements.append(GraphQLElement(
+                    document_id=doc_id,
+                    element_type=kind,
+                    name=name,
+                    fields=fields,
+                    searchable_text=f"{kind} {name} {fields_text}"
+                ))
 
         return elements
 
     def extract_fields(self, code: str) -> List[str]:
         """Extract field names from GraphQL code"""
-        # Simple field extraction (field_name followed by optional type)
-        fields = re.findall(r'\b([a-z_]\w*)\s*(?:\(|:|\{)', code, re.IGNORECASE)
-        # Limit to MAX_FIELDS_PER_ELEMENT unique fields to avoid bloat
-        return list(set(fields))[:MAX_FIELDS_PER_ELEMENT]
+        # Simple field extraction (field_name followed by optional type).
+        # Keep the first MAX_FIELDS_PER_ELEMENT unique fields in order of
+        # appearance and stop scanning once that many have been seen.
+        fields = {}
+        for match in _RE_FIELD.finditer(code):
+            if len(fields) >= MAX_FIELDS_PER_ELEMENT:
+                break
+            fields[match.group(1)] = None
+        return list(fields)
 
     def extract_parameters(self, code: str) -> List[str]:
         """Extract parameter names from GraphQL code"""
-        # Extract parameters in format ($paramName: Type)
-        params = re.findall(r'\$(\w+)\s*:', code)
-        return list(set(params))
+        # Extract parameters in format ($paramName: Type), unique and in order
+        return list(dict.fromkeys(_RE_PARAM.findall(code)))
+
+    def parse_one(self, file_path: Path) -> Optional[ParsedFile]:
+        """Parse a file and extract its code blocks and GraphQL elements"""
+        try:
+            # Parse document
+            doc = self.parse_file(file_path)
+
+            # Extract code blocks
+            code_blocks = self.extract_code_blocks(doc.content_md, doc.id)
+
+            # Extract GraphQL elements from GraphQL code blocks
+            graphql_elements = []
+            for block in code_blocks:
+                if block.language == 'graphql':
+                    graphql_elements.extend(self.extract_graphql_elements(block.code, doc.id))
+
+            return doc, code_blocks, graphql_elements
+
+        except Exception as e:
+            logger.error(f"Error parsing {file_path}: {e}")
+            return None
 
-    def parse_all(self) -> Tuple[List[Document], List[CodeBlock], List[GraphQLElement]]:
-        """Parse all markdown files and extract all data"""
+    def iter_parsed(self, files: Optional[List[Path]] = None) -> Iterator[ParsedFile]:
+        """
+        Parse markdown files (all under docs_root by default) one at a time.
+
+        Yields (document, code blocks, GraphQL elements) per successfully
+        parsed file, so callers can stream results instead of holding the
+        whole documentation set in memory.
+        """
+        if files is None:
+            files = self.walk_directory()
+
+        for parsed in self._map_files(files):
+            if parsed is not None:
+                yield parsed
+
+    def parse_all(
+        self,
+        files: Optional[List[Path]] = None
+    ) -> Tuple[List[Document], List[CodeBlock], List[GraphQLElement]]:
+        """Parse markdown files (all under docs_root by default) and extract all data"""
         documents = []
         all_code_blocks = []
         all_graphql_elements = []
 
-        files = self.walk_directory()
-
-        for file_path in files:
-            try:
-                # Parse document
-                doc = self.parse_file(file_path)
-                documents.append(doc)
-
-                # Extract code blocks
-                code_blocks = self.extract_code_blocks(doc.content_md, doc.id)
-                all_code_blocks.extend(code_blocks)
-
-                # Extract GraphQL elements from GraphQL code blocks
-                for block in code_blocks:
-                    if block.language == 'graphql':
-                        elements = self.extract_graphql_elements(block.code, doc.id)
-                        all_graphql_elements.extend(elements)
-
-            except Exception as e:
-                logger.error(f"Error parsing {file_path}: {e}")
-                continue
+        for doc, code_blocks, graphql_elements in self.iter_parsed(files):
+            documents.append(doc)
+            all_code_blocks.extend(code_blocks)
+            all_graphql_elements.extend(graphql_elements)
 
         logger.info(f"Parsed {len(documents)} documents, {len(all_code_blocks)} code blocks, {len(all_graphql_elements)} GraphQL elements")
 
         return documents, all_code_blocks, all_graphql_elements
+
+    def _map_files(
+        self,
+        files: List[Path],
+        workers: Optional[int] = None
+    ) -> Iterator[Optional[ParsedFile]]:
+        """
+        Run parse_one over files in order, in worker processes when it pays off.
+
+        Parsing is CPU-bound pure Python, so large trees are spread across
+        a process pool. Small trees, single-core machines and platforms
+        where a pool cannot be started fall back to a serial loop, which
+        also picks up where a pool that broke part-way left off. workers
+        overrides the pool size picked from the CPU and file count.
+        """
+        done = 0
+        if workers is None:
+            workers = min(os.cpu_count() or 1, len(files) // PARSE_CHUNKSIZE)
+        if workers > 1:
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context(PARSE_START_METHOD)
+                ) as executor:
+                    for parsed in executor.map(self.parse_one, files, chunksize=PARSE_CHUNKSIZE):
+                        done += 1
+                        yield parsed
+                return
+            except (OSError, NotImplementedError, BrokenProcessPool) as e:
+                logger.warning(f"Parallel parsing unavailable ({e}), parsing serially")
+
+        for file_path in files[done:]:
+            yield self.parse_one(file_path)
@@ -1,18 +1,180 @@
 from fastmcp import FastMCP
+from collections import defaultdict
 from contextlib import asynccontextmanager
+from functools import lru_cache, wraps
+from itertools import groupby
+from operator import itemgetter
 from .ingest import ingest_graphql_docs
 from sqlite_utils import Database
 from pydantic import Field
-from typing import List, Optional
-from .config import DB_PATH, DB_TOP_K, MAX_CODE_PREVIEW_LENGTH, SEARCH_RESULT_MULTIPLIER
+from typing import List, Optional, Tuple
+from .config import DB_CONCURRENCY, DB_PATH, DB_TOP_K, IN_MEMORY, MAX_CODE_PREVIEW_LENGTH
 from typing import Annotated
-import json
+import asyncio
+import io
 import logging
+import orjson
+import sqlite3
 import sys
+import threading
+import zlib
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Read-only connection shared by all tool calls, see get_db()
+_DB: Optional[Database] = None
+
+# Serializes the lazy open in get_db(), which may run on several worker
+# threads at once
+_db_lock = threading.Lock()
+
+# Limits how many tool calls query the database in worker threads at once
+_db_slots = asyncio.Semaphore(DB_CONCURRENCY)
+
+# Shortest query the trigram full-text indexes can match
+TRIGRAM_MIN_LENGTH = 3
+
+# Maximum number of formatted results kept per search tool. The database
+# does not change while the server runs, so entries never go stale.
+SEARCH_CACHE_SIZE = 512
+
+# Applied once per connection. The server never writes, so query_only
+# guards against accidental writes while ingestion owns the file.
+DB_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA query_only=1",
+)
+
+# Markdown templates for the repeated parts of tool output
+DOC_RESULT_TEMPLATE = """\
+### {title}
+**Path:** {file_path}
+**Category:** {category}/{subcategory}
+**Type:** {content_type}
+**Description:** {excerpt}...
+"""
+
+ELEMENT_RESULT_TEMPLATE = """\
+### `{element_type}` **{name}**
+**Source:** {source}
+**Fields:** {fields}
+**Parameters:** {parameters}
+"""
+
+EXAMPLE_RESULT_TEMPLATE = """\
+### {title}
+**File:** {file_path}
+**Language:** {language}
+{context}
+```{language}
+{code}
+```
+"""
+
+RELATED_RESULT_TEMPLATE = """\
+### {title}
+**Path:** {file_path}
+**Relationship:** {relationship}
+**Category:** {category}/{subcategory}
+{description}"""
+
+
+def _decompress(data: Optional[bytes]) -> str:
+    """Decompress a zlib-compressed text column of the documents table"""
+    if not data:
+        return ''
+    return zlib.decompress(data).decode('utf-8')
+
+
+@lru_cache(maxsize=1024)
+def _json_list(text: str) -> Tuple[str, ...]:
+    """Decode a stored JSON list column, e.g. fields_json"""
+    return tuple(orjson.loads(text))
+
+
+def _fts_query(text: str) -> str:
+    """
+    Turn a keyword query into an FTS5 MATCH expression.
+
+    Each word is quoted, so punctuation such as '-' or ':' is matched
+    literally instead of being parsed as FTS5 syntax. A trailing '*' is
+    kept as a prefix search.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*')
+        if word:
+            terms.append('"' + word.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return " ".join(terms)
+
+
+def _truncate(text: str, preview_length: Optional[int]) -> str:
+    """Cut a formatted response down to preview_length characters, if requested"""
+    if preview_length is None:
+        return text
+    return text[:preview_length]
+
+
+def open_db() -> Database:
+    """
+    Open a read-only connection to the documentation database.
+
+    With MAGENTO_GRAPHQL_DOCS_IN_MEMORY set, the database file is copied
+    into an in-memory database first, so queries never touch the disk.
+    """
+    # Tools may run on worker threads, so the connection must not be
+    # bound to the thread that opened it
+    if IN_MEMORY:
+        conn = sqlite3.connect(":memory:", check_same_thread=False, isolation_level=None)
+        source = sqlite3.connect(DB_PATH)
+        try:
+            source.backup(conn)
+        finally:
+            source.close()
+    else:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    # Rows support access by column name without building a dict per row
+    conn.row_factory = sqlite3.Row
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
+    return Database(conn)
+
+
+def get_db() -> Database:
+    """Return the shared database connection, opening it on first use"""
+    global _DB
+    if _DB is None:
+        with _db_lock:
+            if _DB is None:
+                _DB = open_db()
+    return _DB
+
+
+def _threaded(func):
+    """
+    Turn a blocking tool function into a coroutine run in a worker thread.
+
+    Keeps the event loop free to serve other requests while SQLite works.
+    The wrapper keeps the original signature, so FastMCP builds the same
+    tool schema from it.
+    """
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        async with _db_slots:
+            return await asyncio.to_thread(func, *args, **kwargs)
+    return wrapper
+
+
+def clear_caches() -> None:
+    """Drop cached tool results, e.g. after the database was rebuilt"""
+    for cached in (_search_documentation, _search_graphql_elements, _list_categories, _search_examples):
+        cached.cache_clear()
+
 
 @asynccontextmanager
 async def server_lifespan(server: FastMCP):
@@ -29,7 +191,16 @@ async def server_lifespan(server: FastMCP):
     except Exception as e:
         logger.error(f"Unexpected error during ingestion: {e}")
         raise
-    yield
+
+    # Open the shared connection only once ingestion has finished writing
+    global _DB
+    _DB = open_db()
+    clear_caches()
+    try:
+        yield
+    finally:
+        _DB.conn.close()
+        _DB = None
 
 
 # Initialize FastMCP server with lifespan
@@ -42,6 +213,7 @@ mcp = FastMCP("Magento GraphQL Docs", lifespan=server_lifespan)
 Use SHORT keyword queries (1-3 words) to find documentation pages.
 Can filter by category, subcategory, or content type."""
 )
+@_threaded
 def search_documentation(
     queries: Annotated[
         List[str],
@@ -58,114 +230,155 @@ def search_documentation(
     content_type: Annotated[
         Optional[str],
         Field(description="Filter by content type: guide, reference, tutorial, schema")
+    ] = None,
+    preview_length: Annotated[
+        Optional[int],
+        Field(description="Optional maximum number of characters to return, e.g., 1000", ge=1)
     ] = None
 ) -> str:
     """Search documentation with filters"""
-    db = Database(DB_PATH)
+    return _truncate(
+        _search_documentation(tuple(queries), category, subcategory, content_type),
+        preview_length
+    )
+
+
+@lru_cache(maxsize=SEARCH_CACHE_SIZE)
+def _search_documentation(
+    queries: Tuple[str, ...],
+    category: Optional[str],
+    subcategory: Optional[str],
+    content_type: Optional[str]
+) -> str:
+    """Cached search_documentation result, before preview truncation"""
+    db = get_db()
 
     # Combine queries with OR
-    combined_query = " OR ".join(f"({q})" for q in queries)
+    combined_query = " OR ".join(f"({q})" for q in map(_fts_query, queries) if q)
 
-    # Perform FTS search (fetch more results than needed to allow for filtering)
-    results = list(db["documents"].search(combined_query, limit=DB_TOP_K * SEARCH_RESULT_MULTIPLIER))
+    if not combined_query:
+        return "No matching documentation found."
+
+    # Filter and limit inside the FTS query, so only the returned rows
+    # leave SQLite. The compressed body is only read for rows without a
+    # description, the only ones whose excerpt comes from it.
+    sql = """
+        SELECT d.title, d.file_path, d.category, d.subcategory, d.content_type,
+               d.description,
+               CASE WHEN d.description IS NULL OR d.description = ''
+                    THEN d.content_md END AS content_md
+        FROM documents_fts f
+        JOIN documents d ON d.rowid = f.rowid
+        WHERE documents_fts MATCH :query
+    """
+    params = {"query": combined_query, "limit": DB_TOP_K}
 
-    # Apply filters
     if category:
-        results = [r for r in results if r['category'] == category]
+        sql += " AND d.category = :category"
+        params["category"] = category
 
     if subcategory:
-        results = [r for r in results if r.get('subcategory') == subcategory]
+        sql += " AND d.subcategory = :subcategory"
+        params["subcategory"] = subcategory
 
     if content_type:
-        results = [r for r in results if r.get('content_type') == content_type]
+        sql += " AND d.content_type = :content_type"
+        params["content_type"] = content_type
+
+    sql += " ORDER BY f.rank LIMIT :limit"
 
-    # Limit after filtering
-    results = results[:DB_TOP_K]
+    results = db.execute(sql, params).fetchall()
 
     if not results:
         return "No matching documentation found."
 
     # Format results
-    formatted_results = []
-    for doc in results:
-        excerpt = doc.get('description') or doc.get('content_md', '')[:200]
-
-        formatted_results.append(
-            f"### {doc['title']}\n"
-            f"**Path:** {doc['file_path']}\n"
-            f"**Category:** {doc['category']}/{doc.get('subcategory', 'N/A')}\n"
-            f"**Type:** {doc.get('content_type', 'N/A')}\n"
-            f"**Description:** {excerpt}...\n"
+    return "\n---\n\n".join(
+        DOC_RESULT_TEMPLATE.format(
+            title=doc['title'],
+            file_path=doc['file_path'],
+            category=doc['category'],
+            subcategory=doc['subcategory'],
+            content_type=doc['content_type'],
+            excerpt=doc['description'] or _decompress(doc['content_md'])[:200],
         )
-
-    return "\n---\n\n".join(formatted_results)
+        for doc in results
+    )
 
 
 @mcp.tool(
     name="get_document",
     description="Retrieve complete documentation page by file path"
 )
+@_threaded
 def get_document(
-    file_path: Annotated[str, Field(description="File path relative to docs root, e.g., 'schema/products/queries/products.md'")]
+    file_path: Annotated[str, Field(description="File path relative to docs root, e.g., 'schema/products/queries/products.md'")],
+    preview_length: Annotated[
+        Optional[int],
+        Field(description="Optional maximum number of characters to return, e.g., 1000", ge=1)
+    ] = None
 ) -> str:
     """Get full document content"""
-    db = Database(DB_PATH)
+    db = get_db()
 
-    try:
-        # Query by file_path
-        doc = dict(db.query(
-            "SELECT * FROM documents WHERE file_path = ?",
-            [file_path]
-        ).__next__())
-    except StopIteration:
-        return f"Document not found: {file_path}\n\nTip: Use search_documentation to find the correct file path."
-
-    # Parse keywords
-    keywords = json.loads(doc.get('keywords_json', '[]'))
-    keywords_str = ', '.join(keywords) if keywords else 'None'
+    # The page is formatted once at ingestion
+    row = db.execute(
+        "SELECT formatted_md FROM documents WHERE file_path = ?",
+        [file_path]
+    ).fetchone()
 
-    # Format document
-    lines = [
-        f"# {doc['title']}",
-        "",
-        f"**Path:** {doc['file_path']}",
-        f"**Category:** {doc['category']}/{doc.get('subcategory', 'N/A')}",
-        f"**Type:** {doc.get('content_type', 'N/A')}",
-        f"**Keywords:** {keywords_str}",
-        "",
-    ]
-
-    if doc.get('description'):
-        lines.append(f"**Description:** {doc['description']}")
-        lines.append("")
-
-    lines.append("---")
-    lines.append("")
-    lines.append(doc['content_md'])
+    if row is None:
+        return f"Document not found: {file_path}\n\nTip: Use search_documentation to find the correct file path."
 
-    return "\n".join(lines)
+    return _truncate(_decompress(row[0]), preview_length)
 
 
 @mcp.tool(
     name="search_graphql_elements",
     description="Search for GraphQL queries, mutations, types, or interfaces"
 )
+@_threaded
 def search_graphql_elements(
     query: Annotated[str, Field(description="Search term, e.g., 'products', 'cart', 'customer'")],
     element_type: Annotated[
         Optional[str],
         Field(description="Filter by element type: query, mutation, type, interface, union")
+    ] = None,
+    preview_length: Annotated[
+        Optional[int],
+        Field(description="Optional maximum number of characters to return, e.g., 1000", ge=1)
     ] = None
 ) -> str:
     """Search GraphQL schema elements"""
-    db = Database(DB_PATH)
+    return _truncate(_search_graphql_elements(query, element_type), preview_length)
+
 
-    # FTS search
-    results = list(db["graphql_elements"].search(query, limit=10))
+@lru_cache(maxsize=SEARCH_CACHE_SIZE)
+def _search_graphql_elements(query: str, element_type: Optional[str]) -> str:
+    """Cached search_graphql_elements result, before preview truncation"""
+    db = get_db()
+
+    match = _fts_query(query)
+
+    if not match:
+        return f"No GraphQL elements found matching: {query}"
+
+    # FTS search, filtered and limited in SQL
+    sql = """
+        SELECT e.element_type, e.name, e.doc_title, e.doc_path, e.fields_json, e.parameters_json
+        FROM graphql_elements_fts f
+        JOIN graphql_elements e ON e.rowid = f.rowid
+        WHERE graphql_elements_fts MATCH ?
+    """
+    params = [match]
 
-    # Apply filter
     if element_type:
-        results = [r for r in results if r['element_type'] == element_type]
+        sql += " AND e.element_type = ?"
+        params.append(element_type)
+
+    sql += " ORDER BY f.rank LIMIT 10"
+
+    results = db.execute(sql, params).fetchall()
 
     if not results:
         return f"No GraphQL elements found matching: {query}"
@@ -173,25 +386,16 @@ def search_graphql_elements(
     # Format results
     formatted_results = []
     for elem in results:
-        # Get source document
-        try:
-            doc = dict(db.query(
-                "SELECT title, file_path FROM documents WHERE id = ?",
-                [elem['document_id']]
-            ).__next__())
-            source = f"{doc['title']} ({doc['file_path']})"
-        except StopIteration:
-            source = "Unknown"
-
-        fields = json.loads(elem.get('fields_json', '[]'))
-        params = json.loads(elem.get('parameters_json', '[]'))
-
-        formatted_results.append(
-            f"### `{elem['element_type']}` **{elem['name']}**\n"
-            f"**Source:** {source}\n"
-            f"**Fields:** {', '.join(fields[:10]) if fields else 'None'}\n"
-            f"**Parameters:** {', '.join(params) if params else 'None'}\n"
-        )
+        fields = _json_list(elem['fields_json'])
+        params = _json_list(elem['parameters_json'])
+
+        formatted_results.append(ELEMENT_RESULT_TEMPLATE.format(
+            element_type=elem['element_type'],
+            name=elem['name'],
+            source=f"{elem['doc_title']} ({elem['doc_path']})" if elem['doc_path'] else "Unknown",
+            fields=', '.join(fields[:10]) if fields else 'None',
+            parameters=', '.join(params) if params else 'None',
+        ))
 
     return "\n---\n\n".join(formatted_results)
 
@@ -200,268 +404,290 @@ def search_graphql_elements(
     name="get_element_details",
     description="Get complete details about a specific GraphQL element"
 )
+@_threaded
 def get_element_details(
     element_name: Annotated[str, Field(description="Element name, e.g., 'products', 'createCustomer', 'ProductInterface'")],
-    element_type: Annotated[Optional[str], Field(description="Optional type filter: query, mutation, type, interface")] = None
+    element_type: Annotated[Optional[str], Field(description="Optional type filter: query, mutation, type, interface")] = None,
+    preview_length: Annotated[
+        Optional[int],
+        Field(description="Optional maximum number of characters to return, e.g., 1000", ge=1)
+    ] = None
 ) -> str:
     """Get element details with source document"""
-    db = Database(DB_PATH)
+    db = get_db()
+
+    # Elements with up to 3 GraphQL examples from their source document,
+    # one row per example (or a single row if there are none)
+    sql = """
+        SELECT e.id, e.element_type, e.name, e.fields_json, e.parameters_json,
+               e.description, e.doc_title, e.doc_path, cb.code
+        FROM graphql_elements e
+        LEFT JOIN code_blocks cb
+            ON cb.document_id = e.document_id AND cb.language = 'graphql' AND cb.id IN (
+                SELECT id FROM code_blocks
+                WHERE document_id = e.document_id AND language = 'graphql'
+                ORDER BY id LIMIT 3
+            )
+        WHERE e.name = ?
+    """
+    params = [element_name]
 
-    # Build query
     if element_type:
-        sql = "SELECT * FROM graphql_elements WHERE name = ? AND element_type = ?"
-        params = [element_name, element_type]
-    else:
-        sql = "SELECT * FROM graphql_elements WHERE name = ?"
-        params = [element_name]
+        sql += " AND e.element_type = ?"
+        params.append(element_type)
+
+    sql += " ORDER BY e.id, cb.id"
 
-    elements = list(db.query(sql, params))
+    rows = db.execute(sql, params).fetchall()
 
-    if not elements:
+    if not rows:
         return f"GraphQL element not found: {element_name}\n\nTip: Use search_graphql_elements to find similar elements."
 
     # Format each element
     formatted = []
-    for elem in elements:
-        # Get source document
-        try:
-            doc = dict(db.query(
-                "SELECT * FROM documents WHERE id = ?",
-                [elem['document_id']]
-            ).__next__())
-        except StopIteration:
-            doc = None
+    for _, element_rows in groupby(rows, key=itemgetter('id')):
+        element_rows = list(element_rows)
+        elem = element_rows[0]
 
-        fields = json.loads(elem.get('fields_json', '[]'))
-        params = json.loads(elem.get('parameters_json', '[]'))
+        fields = _json_list(elem['fields_json'])
+        params = _json_list(elem['parameters_json'])
 
-        lines = [
-            f"# `{elem['element_type']}` **{elem['name']}**",
-            ""
-        ]
+        # Blank-line separated sections of this element
+        sections = [f"# `{elem['element_type']}` **{elem['name']}**"]
 
         if params:
-            lines.append(f"**Parameters:** {', '.join(params)}")
-            lines.append("")
+            sections.append(f"**Parameters:** {', '.join(params)}")
 
         if fields:
-            lines.append(f"**Fields:** {', '.join(fields)}")
-            lines.append("")
-
-        if elem.get('description'):
-            lines.append(f"**Description:** {elem['description']}")
-            lines.append("")
-
-        if doc:
-            lines.append(f"**Source Document:** {doc['title']}")
-            lines.append(f"**Path:** {doc['file_path']}")
-            lines.append("")
-
-            # Get code blocks from same document
-            code_blocks = list(db.query(
-                "SELECT * FROM code_blocks WHERE document_id = ? AND language = 'graphql' LIMIT 3",
-                [elem['document_id']]
-            ))
-
-            if code_blocks:
-                lines.append("**Example Code:**")
-                lines.append("")
-                for block in code_blocks:
-                    lines.append("```graphql")
+            sections.append(f"**Fields:** {', '.join(fields)}")
+
+        if elem['description']:
+            sections.append(f"**Description:** {elem['description']}")
+
+        if elem['doc_path'] is not None:
+            sections.append(f"**Source Document:** {elem['doc_title']}\n**Path:** {elem['doc_path']}")
+
+            # Code blocks from the same document
+            if elem['code'] is not None:
+                sections.append("**Example Code:**")
+                for row in element_rows:
                     # Limit code length for readability
-                    code_preview = block['code'][:MAX_CODE_PREVIEW_LENGTH + 100]
-                    lines.append(code_preview)
-                    lines.append("```")
-                    lines.append("")
+                    sections.append(f"```graphql\n{row['code'][:MAX_CODE_PREVIEW_LENGTH + 100]}\n```")
 
-        formatted.append("\n".join(lines))
+        formatted.append("\n\n".join(sections) + "\n")
 
-    return "\n---\n\n".join(formatted)
+    return _truncate("\n---\n\n".join(formatted), preview_length)
 
 
 @mcp.tool(
     name="list_categories",
     description="List all documentation categories with document counts"
 )
+@_threaded
 def list_categories() -> str:
     """List category hierarchy"""
-    db = Database(DB_PATH)
+    return _list_categories()
 
-    # Get category counts
-    categories = db.query(
-        "SELECT category, subcategory, COUNT(*) as count FROM documents GROUP BY category, subcategory ORDER BY category, subcategory"
+
+@lru_cache(maxsize=1)
+def _list_categories() -> str:
+    """Cached list_categories result"""
+    db = get_db()
+
+    # Get category counts, precomputed at ingestion
+    categories = db.execute(
+        "SELECT category, subcategory, count FROM category_stats ORDER BY category, subcategory"
     )
 
     # Build hierarchy
     cat_tree = {}
     for row in categories:
-        cat = row['category']
-        subcat = row['subcategory'] or 'N/A'
-        count = row['count']
-
-        if cat not in cat_tree:
-            cat_tree[cat] = {}
-
-        cat_tree[cat][subcat] = count
+        cat_tree.setdefault(row['category'], {})[row['subcategory'] or 'N/A'] = row['count']
 
     # Format output
-    lines = ["# Magento 2 GraphQL Documentation Categories\n"]
+    out = io.StringIO()
+    out.write("# Magento 2 GraphQL Documentation Categories\n")
 
     for cat in sorted(cat_tree.keys()):
         # Calculate total for category
         total = sum(cat_tree[cat].values())
-        lines.append(f"## {cat} ({total} documents)")
-        lines.append("")
+        out.write(f"\n## {cat} ({total} documents)\n\n")
 
         for subcat in sorted(cat_tree[cat].keys()):
-            count = cat_tree[cat][subcat]
-            lines.append(f"  - `{subcat}`: {count} documents")
-
-        lines.append("")
+            out.write(f"  - `{subcat}`: {cat_tree[cat][subcat]} documents\n")
 
-    return "\n".join(lines)
+    return out.getvalue()
 
 
 @mcp.tool(
     name="get_tutorial",
     description="Get complete tutorial with all steps in order"
 )
+@_threaded
 def get_tutorial(
-    tutorial_name: Annotated[str, Field(description="Tutorial name, e.g., 'checkout'")]
+    tutorial_name: Annotated[str, Field(description="Tutorial name, e.g., 'checkout'")],
+    preview_length: Annotated[
+        Optional[int],
+        Field(description="Optional maximum number of characters to return, e.g., 1000", ge=1)
+    ] = None
 ) -> str:
     """Get sequential tutorial steps"""
-    db = Database(DB_PATH)
+    db = get_db()
 
     # Search for tutorial documents
-    docs = list(db.query(
-        "SELECT * FROM documents WHERE category = 'tutorials' AND (subcategory = ? OR file_path LIKE ?) ORDER BY file_path",
+    docs = db.execute(
+        "SELECT id, title, file_path, description FROM documents WHERE category = 'tutorials' AND (subcategory = ? OR file_path LIKE ?) ORDER BY file_path",
         [tutorial_name, f"tutorials/{tutorial_name}%"]
-    ))
+    ).fetchall()
 
     if not docs:
         return f"Tutorial not found: {tutorial_name}\n\nAvailable tutorials: Use list_categories() to see all tutorials."
 
+    # Get code examples for all steps at once, the first 2 of each step
+    placeholders = ", ".join("?" * len(docs))
+    code_by_doc = defaultdict(list)
+    for block in db.execute(
+        f"SELECT document_id, language, code FROM code_blocks WHERE document_id IN ({placeholders}) AND language IN ('graphql', 'json') ORDER BY id",
+        [doc['id'] for doc in docs]
+    ):
+        if len(code_by_doc[block['document_id']]) < 2:
+            code_by_doc[block['document_id']].append(block)
+
     # Format tutorial
-    lines = [f"# {tutorial_name.title()} Tutorial", ""]
+    out = io.StringIO()
+    out.write(f"# {tutorial_name.title()} Tutorial\n")
 
     for i, doc in enumerate(docs, 1):
-        lines.append(f"## Step {i}: {doc['title']}")
-        lines.append("")
-        lines.append(f"**File:** {doc['file_path']}")
-        lines.append("")
-
-        if doc.get('description'):
-            lines.append(doc['description'])
-            lines.append("")
-
-        # Get code examples
-        code_blocks = list(db.query(
-            "SELECT * FROM code_blocks WHERE document_id = ? AND language IN ('graphql', 'json') LIMIT 2",
-            [doc['id']]
-        ))
+        out.write(f"\n## Step {i}: {doc['title']}\n\n**File:** {doc['file_path']}\n\n")
+
+        if doc['description']:
+            out.write(f"{doc['description']}\n\n")
 
-        if code_blocks:
-            for block in code_blocks:
-                lines.append(f"```{block['language']}")
-                lines.append(block['code'])
-                lines.append("```")
-                lines.append("")
+        for block in code_by_doc[doc['id']]:
+            out.write(f"```{block['language']}\n{block['code']}\n```\n\n")
 
-        lines.append("---")
-        lines.append("")
+        out.write("---\n")
 
-    return "\n".join(lines)
+    return _truncate(out.getvalue(), preview_length)
 
 
 @mcp.tool(
     name="search_examples",
     description="Search for code examples by topic and language"
 )
+@_threaded
 def search_examples(
     query: Annotated[str, Field(description="Search term for code examples")],
     language: Annotated[
         Optional[str],
         Field(description="Filter by language: graphql, json, javascript, php, bash")
+    ] = None,
+    preview_length: Annotated[
+        Optional[int],
+        Field(description="Optional maximum number of characters to return, e.g., 1000", ge=1)
     ] = None
 ) -> str:
     """Search code blocks"""
-    db = Database(DB_PATH)
-
-    # Search in code and context
-    sql = """
-        SELECT cb.*, d.title, d.file_path
-        FROM code_blocks cb
-        JOIN documents d ON cb.document_id = d.id
-        WHERE (cb.code LIKE ? OR cb.context LIKE ?)
-    """
-    params = [f"%{query}%", f"%{query}%"]
+    return _truncate(_search_examples(query, language), preview_length)
+
+
+@lru_cache(maxsize=SEARCH_CACHE_SIZE)
+def _search_examples(query: str, language: Optional[str]) -> str:
+    """Cached search_examples result, before preview truncation"""
+    db = get_db()
+
+    if len(query) < TRIGRAM_MIN_LENGTH:
+        # Too short for the trigram index to match anything, so scan
+        sql = """
+            SELECT cb.language, cb.code, cb.context, d.title, d.file_path
+            FROM code_blocks cb
+            JOIN documents d ON cb.document_id = d.id
+            WHERE (cb.code LIKE ? OR cb.context LIKE ?)
+        """
+        params = [f"%{query}%", f"%{query}%"]
+        order_by = ""
+    else:
+        # Search in code and context. The whole query is one quoted string,
+        # so the trigram index matches it as a substring, like LIKE '%query%'.
+        sql = """
+            SELECT cb.language, cb.code, cb.context, d.title, d.file_path
+            FROM code_blocks_fts f
+            JOIN code_blocks cb ON cb.rowid = f.rowid
+            JOIN documents d ON cb.document_id = d.id
+            WHERE code_blocks_fts MATCH ?
+        """
+        params = ['"' + query.replace('"', '""') + '"']
+        order_by = " ORDER BY f.rank"
 
     if language:
         sql += " AND cb.language = ?"
         params.append(language)
 
-    sql += " LIMIT 10"
+    sql += order_by + " LIMIT 10"
 
-    results = list(db.query(sql, params))
+    results = db.execute(sql, params).fetchall()
 
     if not results:
         return f"No code examples found matching: {query}"
 
     # Format results
-    formatted = []
-    for block in results:
-        context_str = f"**Context:** {block['context']}\n" if block.get('context') else ""
-
-        formatted.append(
-            f"### {block['title']}\n"
-            f"**File:** {block['file_path']}\n"
-            f"**Language:** {block['language']}\n"
-            f"{context_str}"
-            f"\n```{block['language']}\n"
-            f"{block['code'][:MAX_CODE_PREVIEW_LENGTH]}\n"  # Limit code length for readability
-            f"```\n"
+    return "\n---\n\n".join(
+        EXAMPLE_RESULT_TEMPLATE.format(
+            title=block['title'],
+            file_path=block['file_path'],
+            language=block['language'],
+            context=f"**Context:** {block['context']}\n" if block['context'] else "",
+            code=block['code'][:MAX_CODE_PREVIEW_LENGTH],  # Limit code length for readability
         )
-
-    return "\n---\n\n".join(formatted)
+        for block in results
+    )
 
 
 @mcp.tool(
     name="get_related_documents",
     description="Find documents related to the specified document"
 )
+@_threaded
 def get_related_documents(
-    file_path: Annotated[str, Field(description="File path of source document")]
+    file_path: Annotated[str, Field(description="File path of source document")],
+    preview_length: Annotated[
+        Optional[int],
+        Field(description="Optional maximum number of characters to return, e.g., 1000", ge=1)
+    ] = None
 ) -> str:
     """Find related docs"""
-    db = Database(DB_PATH)
+    db = get_db()
 
     # Get source document
-    try:
-        source_doc = dict(db.query(
-            "SELECT * FROM documents WHERE file_path = ?",
-            [file_path]
-        ).__next__())
-    except StopIteration:
+    source_doc = db.execute(
+        "SELECT title, category, subcategory, keywords_json FROM documents WHERE file_path = ?",
+        [file_path]
+    ).fetchone()
+
+    if source_doc is None:
         return f"Document not found: {file_path}"
 
     # Find related documents
     # 1. Same category and subcategory
-    related_by_category = list(db.query(
-        "SELECT * FROM documents WHERE category = ? AND subcategory = ? AND file_path != ? LIMIT 5",
+    related_by_category = db.execute(
+        "SELECT title, file_path, category, subcategory, description FROM documents WHERE category = ? AND subcategory = ? AND file_path != ? LIMIT 5",
         [source_doc['category'], source_doc['subcategory'], file_path]
-    ))
-
-    # 2. Similar keywords
-    source_keywords = set(json.loads(source_doc.get('keywords_json', '[]')))
-    related_by_keywords = []
-
-    if source_keywords:
-        for keyword in list(source_keywords)[:3]:
-            matches = list(db.query(
-                "SELECT * FROM documents WHERE keywords_json LIKE ? AND file_path != ? LIMIT 3",
-                [f"%{keyword}%", file_path]
-            ))
-            related_by_keywords.extend(matches)
+    ).fetchall()
+
+    # 2. Similar keywords, most shared keywords first. The source keyword
+    # list is expanded by SQLite, so it is never parsed in Python.
+    related_by_keywords = db.execute(
+        """
+        SELECT d.title, d.file_path, d.category, d.subcategory, d.description
+        FROM document_keywords k
+        JOIN documents d ON d.id = k.document_id
+        WHERE k.keyword IN (SELECT value FROM json_each(?)) AND d.file_path != ?
+        GROUP BY d.id
+        ORDER BY COUNT(*) DESC, d.rowid
+        LIMIT 5
+        """,
+        [source_doc['keywords_json'] or '[]', file_path]
+    ).fetchall()
 
     # Combine and deduplicate
     seen = set()
@@ -478,22 +704,19 @@ def get_related_documents(
         return f"No related documents found for: {file_path}"
 
     # Format results
-    lines = [f"# Related Documents for: {source_doc['title']}", ""]
-
-    for doc in all_related:
-        relationship = "Same category" if doc['category'] == source_doc['category'] else "Similar content"
-
-        lines.append(f"### {doc['title']}")
-        lines.append(f"**Path:** {doc['file_path']}")
-        lines.append(f"**Relationship:** {relationship}")
-        lines.append(f"**Category:** {doc['category']}/{doc.get('subcategory', 'N/A')}")
-
-        if doc.get('description'):
-            lines.append(f"**Description:** {doc['description'][:150]}...")
-
-        lines.append("")
+    results = "\n".join(
+        RELATED_RESULT_TEMPLATE.format(
+            title=doc['title'],
+            file_path=doc['file_path'],
+            relationship="Same category" if doc['category'] == source_doc['category'] else "Similar content",
+            category=doc['category'],
+            subcategory=doc['subcategory'],
+            description=f"**Description:** {doc['description'][:150]}...\n" if doc['description'] else "",
+        )
+        for doc in all_related
+    )
 
-    return "\n".join(lines)
+    return _truncate(f"# Related Documents for: {source_doc['title']}\n\n{results}", preview_length)
 
 
 def main():
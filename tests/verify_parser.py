@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 """Verify that the markdown parser works correctly"""
+import logging
 import sys
 from pathlib import Path
 
@@ -48,6 +49,29 @@ def main():
     print(f"✓ Successfully parsed all documents")
     print()
 
+    # Parse through the process pool, even on small trees or single-core
+    # machines, and check it matches the serial path
+    print("Parsing in worker processes...")
+    fallbacks = []
+    handler = logging.Handler(logging.WARNING)
+    handler.emit = lambda record: fallbacks.append(record.getMessage())
+    parser_logger = logging.getLogger("magento_graphql_docs_mcp.parser")
+    parser_logger.addHandler(handler)
+    try:
+        pooled = list(parser._map_files(files, workers=2))
+    finally:
+        parser_logger.removeHandler(handler)
+
+    if fallbacks:
+        print(f"❌ Process pool was not used: {fallbacks[0]}")
+        return 1
+    if pooled != list(parser._map_files(files, workers=1)):
+        print("❌ Parallel parsing results differ from serial parsing")
+        return 1
+
+    print(f"✓ Parsed {len(pooled)} files in worker processes")
+    print()
+
     # Stats
     print("Statistics:")
     print(f"  - Total documents: {len(documents)}")
@@ -1,120 +1,253 @@
 #!/usr/bin/env python3
 """Verify that the MCP server works correctly"""
+import argparse
 import asyncio
+import functools
+import json
+import os
+import statistics
 import sys
+import time
 from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-
-
-async def run():
-    print("=" * 70)
-    print("Magento GraphQL Docs MCP Server Verification")
-    print("=" * 70)
-    print()
+try:
+    # Faster event loop for the stdio round-trips, used when installed
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Maximum number of tool calls in flight on the session at once
+CONCURRENCY = max(1, int(os.getenv("MAGENTO_GRAPHQL_DOCS_VERIFY_CONCURRENCY", "4")))
+
+# "print" for readable output, "assert" to only check results (same as --assert)
+MODE = os.getenv("MAGENTO_GRAPHQL_DOCS_VERIFY_MODE", "print")
+
+_RULE = "=" * 70
+
+# (title, tool name, arguments) for each tool test
+CASES = (
+    ("Test 1: Search for 'product', 'cart' and 'checkout' documentation", "search_documentation", {
+        "queries": ["product", "cart", "checkout"]
+    }),
+    ("Test 2: Get document 'index.md'", "get_document", {
+        "file_path": "index.md"
+    }),
+    ("Test 3: Search GraphQL elements for 'products'", "search_graphql_elements", {
+        "query": "products"
+    }),
+    ("Test 4: Get details for 'Query' type", "get_element_details", {
+        "element_name": "Query"
+    }),
+    ("Test 5: List all categories", "list_categories", {}),
+    ("Test 6: Get 'checkout' tutorial", "get_tutorial", {
+        "tutorial_name": "checkout"
+    }),
+    ("Test 7: Search examples for 'mutation'", "search_examples", {
+        "query": "mutation",
+        "language": "graphql"
+    }),
+    ("Test 8: Get related documents for 'index.md'", "get_related_documents", {
+        "file_path": "index.md"
+    }),
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _lazy_imports():
+    """
+    Import the MCP client and build the server parameters on first use.
+
+    Keeps importing this module cheap for tools that only collect it.
+    The result is cached, so repeated runs share one StdioServerParameters.
+    """
+    # Add parent directory to path
+    root = str(Path(__file__).parent.parent)
+    if root not in sys.path:
+        sys.path.insert(0, root)
+
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
 
     server_params = StdioServerParameters(
         command=sys.executable,
         args=["-m", "magento_graphql_docs_mcp.server"],
         env=None
     )
+    return ClientSession, stdio_client, server_params
+
+
+def _summarize(result):
+    """Return the text of a tool result with its length and preview"""
+    text = result.content[0].text
+    return text, len(text), text[:200]
+
+
+def _print_result(title, name, result):
+    """Print the summary of one tool test"""
+    text, length, preview = _summarize(result)
+    if name == "list_categories":
+        category_count = text.count('\n## ') + text.startswith('## ')
+        detail = f"  Categories found: {category_count}"
+    else:
+        detail = f"  Preview: {preview}..."
+    sys.stdout.write(f"{title}\n  Result length: {length} chars\n{detail}\n\n")
+
+
+def _print_timings(samples):
+    """Print min/median/p99 call latency in milliseconds for each tool"""
+    lines = [f"\nTimings over {len(next(iter(samples.values())))} passes (ms):"]
+    for name, values in samples.items():
+        p99 = statistics.quantiles(values, n=100, method="inclusive")[98] if len(values) > 1 else values[0]
+        lines.append(
+            f"  {name:<25} min {min(values) / 1e6:7.2f}"
+            f"  median {statistics.median(values) / 1e6:7.2f}"
+            f"  p99 {p99 / 1e6:7.2f}"
+        )
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def _write_records(records):
+    """Write one JSON line per tool call, for machine-readable CI output"""
+    sys.stdout.write("".join(
+        json.dumps({"tool": name, "len": length, "ns": elapsed}) + "\n"
+        for name, length, elapsed in records
+    ))
+
+
+async def run_once(session, verbose=True, check=False):
+    """
+    Run the tool tests on an initialized session.
+
+    With check set, every result must be a non-error response with text
+    content, otherwise AssertionError is raised.
+
+    Returns (tool_name, result_length, elapsed_ns) for each call, in
+    test order.
+    """
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def call(name, arguments):
+        async with semaphore:
+            start = time.perf_counter_ns()
+            result = await session.call_tool(name, arguments=arguments)
+            return result, time.perf_counter_ns() - start
+
+    # The test calls are independent of each other, so issue them all
+    # at once and report the results in order afterwards
+    timed = await asyncio.gather(*(
+        call(name, arguments) for _, name, arguments in CASES
+    ))
+
+    if check:
+        for (_, name, _), (result, _) in zip(CASES, timed):
+            # mcp 2.x renamed CallToolResult.isError to is_error
+            is_error = getattr(result, "is_error", getattr(result, "isError", False))
+            assert not is_error and result.content and result.content[0].text, \
+                f"{name} returned an error or empty result"
+
+    if verbose:
+        for (title, name, _), (result, _) in zip(CASES, timed):
+            _print_result(title, name, result)
+
+    return [
+        (name, len(result.content[0].text), elapsed)
+        for (_, name, _), (result, elapsed) in zip(CASES, timed)
+    ]
+
+
+async def main(iterations=1, verbose=True, full=False, ci=False, check=False):
+    """
+    Start the server once and run the tool tests against it.
+
+    The same session is reused for every iteration, so repeated passes
+    measure steady-state calls rather than server startup. Results are
+    only printed for the first pass, which also serves as the warm-up;
+    the remaining passes are timed per tool. The list of available
+    tools is only fetched and printed when full is set.
+
+    With ci set, nothing else is printed and every call of every pass is
+    written as a {"tool", "len", "ns"} JSON line instead. With check set,
+    results are asserted rather than printed and a failing tool raises
+    AssertionError.
+    """
+    if ci or check:
+        verbose = False
+
+    ClientSession, stdio_client, server_params = _lazy_imports()
+
+    if verbose:
+        sys.stdout.write(f"{_RULE}\nMagento GraphQL Docs MCP Server Verification\n{_RULE}\n\n")
 
     async with stdio_client(server_params) as (read, write):
         async with ClientSession(read, write) as session:
             # Initialize the connection
             await session.initialize()
-            print("✓ Server initialized")
-            print()
-
-            # List available tools
-            tools = await session.list_tools()
-            print(f"Available tools ({len(tools.tools)}):")
-            for tool in tools.tools:
-                print(f"  - {tool.name}: {tool.description[:60]}...")
-            print()
-
-            # Test 1: Search documentation
-            print("Test 1: Search for 'product' documentation")
-            result = await session.call_tool("search_documentation", arguments={
-                "queries": ["product"]
-            })
-            print(f"  Result length: {len(result.content[0].text)} chars")
-            print(f"  Preview: {result.content[0].text[:200]}...")
-            print()
-
-            # Test 2: Get specific document
-            print("Test 2: Get document 'index.md'")
-            result = await session.call_tool("get_document", arguments={
-                "file_path": "index.md"
-            })
-            print(f"  Result length: {len(result.content[0].text)} chars")
-            print(f"  Preview: {result.content[0].text[:200]}...")
-            print()
-
-            # Test 3: Search GraphQL elements
-            print("Test 3: Search GraphQL elements for 'products'")
-            result = await session.call_tool("search_graphql_elements", arguments={
-                "query": "products"
-            })
-            print(f"  Result length: {len(result.content[0].text)} chars")
-            print(f"  Preview: {result.content[0].text[:200]}...")
-            print()
-
-            # Test 4: Get element details
-            print("Test 4: Get details for 'Query' type")
-            result = await session.call_tool("get_element_details", arguments={
-                "element_name": "Query"
-            })
-            print(f"  Result length: {len(result.content[0].text)} chars")
-            print(f"  Preview: {result.content[0].text[:200]}...")
-            print()
-
-            # Test 5: List categories
-            print("Test 5: List all categories")
-            result = await session.call_tool("list_categories", arguments={})
-            print(f"  Result length: {len(result.content[0].text)} chars")
-            lines = result.content[0].text.split('\n')
-            category_count = len([l for l in lines if l.startswith('##')])
-            print(f"  Categories found: {category_count}")
-            print()
-
-            # Test 6: Get tutorial
-            print("Test 6: Get 'checkout' tutorial")
-            result = await session.call_tool("get_tutorial", arguments={
-                "tutorial_name": "checkout"
-            })
-            print(f"  Result length: {len(result.content[0].text)} chars")
-            print(f"  Preview: {result.content[0].text[:200]}...")
-            print()
-
-            # Test 7: Search examples
-            print("Test 7: Search examples for 'mutation'")
-            result = await session.call_tool("search_examples", arguments={
-                "query": "mutation",
-                "language": "graphql"
-            })
-            print(f"  Result length: {len(result.content[0].text)} chars")
-            print(f"  Preview: {result.content[0].text[:200]}...")
-            print()
-
-            # Test 8: Get related documents
-            print("Test 8: Get related documents for 'index.md'")
-            result = await session.call_tool("get_related_documents", arguments={
-                "file_path": "index.md"
-            })
-            print(f"  Result length: {len(result.content[0].text)} chars")
-            print(f"  Preview: {result.content[0].text[:200]}...")
-            print()
-
-    print("=" * 70)
-    print("✓ All 8 tools tested successfully!")
-    print("=" * 70)
+
+            if verbose:
+                sys.stdout.write("✓ Server initialized\n\n")
+
+            if full and verbose:
+                # List available tools
+                tools = await session.list_tools()
+                sys.stdout.write(
+                    f"Available tools ({len(tools.tools)}):\n"
+                    + "".join(
+                        f"  - {tool.name}: {tool.description[:60]}...\n"
+                        for tool in tools.tools
+                    )
+                    + "\n"
+                )
+
+            records = await run_once(session, verbose=verbose, check=check)
+            if ci:
+                _write_records(records)
+
+            samples = {}
+            for _ in range(iterations - 1):
+                records = await run_once(session, verbose=False, check=check)
+                if ci:
+                    _write_records(records)
+                for name, _, elapsed in records:
+                    samples.setdefault(name, []).append(elapsed)
+
+    if verbose:
+        passes = f" ({iterations} passes)" if iterations > 1 else ""
+        sys.stdout.write(
+            f"{_RULE}\n✓ All {len(CASES)} tools tested successfully{passes}!\n{_RULE}\n"
+        )
+
+        if samples:
+            _print_timings(samples)
     return 0
 
 
 if __name__ == "__main__":
-    sys.exit(asyncio.run(run()))
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "iterations", nargs="?", type=int, default=1,
+        help="number of passes over the tool tests (default: 1)"
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="also list the tools registered on the server"
+    )
+    parser.add_argument(
+        "--ci", action="store_true",
+        help="write one JSON line per tool call instead of readable output"
+    )
+    parser.add_argument(
+        "--assert", dest="check", action="store_true", default=MODE == "assert",
+        help="only assert that every tool returns content, without printing"
+    )
+    args = parser.parse_args()
+
+    # One explicitly created loop runs every pass, with debug mode off
+    loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+    loop.set_debug(False)
+    asyncio.set_event_loop(loop)
+    try:
+        status = loop.run_until_complete(main(args.iterations, full=args.full, ci=args.ci, check=args.check))
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+    sys.exit(status)